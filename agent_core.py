@@ -1,33 +1,590 @@
 # agent_core.py
 import os
-from typing import Dict, List, Optional, Union
+import io
+import json
+import time
+import atexit
+import asyncio
+import hashlib
+import inspect
+import logging
+import sqlite3
+import functools
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from dotenv import load_dotenv
 import anthropic
+import httpx
 import openai
-from pydantic import BaseModel, Field
+from tenacity import before_sleep_log, retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+try:
+    import orjson
+except ImportError:
+    # orjson is an optional accelerator; fall back to the standard library
+    orjson = None
+
+__all__ = ["AIAgent", "Message", "get_agent"]
 
 # Load environment variables
 load_dotenv()
 
-class Message(BaseModel):
+logger = logging.getLogger(__name__)
+
+# Upper bound on in-flight requests issued by AIAgent.analyze_many
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Response length used when a caller does not pass max_tokens
+DEFAULT_MAX_TOKENS = 4000
+
+# Tuned response budgets for the high-level prompt methods. Lowering one truncates
+# long answers; each prompt lists the sections it needs, so these leave headroom.
+_BUDGETS = {"pr": 1500, "tests": 3000, "predict": 4000, "analyze": 2500}
+
+# Seconds between status checks while waiting on a provider batch job
+BATCH_POLL_INTERVAL = 30
+
+@functools.lru_cache(maxsize=1)
+def _shared_http_client() -> httpx.Client:
+    """
+    Get the process-wide HTTP client shared by the Anthropic and OpenAI SDKs
+    
+    Keeping one pooled HTTP/2 client alive avoids paying a TCP+TLS handshake
+    on every request.
+    
+    Returns:
+        httpx.Client: Shared HTTP client
+    """
+    client = httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=90),
+        timeout=httpx.Timeout(120.0, connect=10.0)
+    )
+    atexit.register(client.close)
+    return client
+
+@functools.lru_cache(maxsize=None)
+def _anthropic_client(api_key: Optional[str]) -> anthropic.Anthropic:
+    """
+    Get the process-wide Anthropic client for an API key
+    
+    Args:
+        api_key: Anthropic API key
+        
+    Returns:
+        anthropic.Anthropic: Client shared by every agent using this key
+    """
+    return anthropic.Anthropic(api_key=api_key, http_client=_shared_http_client(), max_retries=0)
+
+@functools.lru_cache(maxsize=None)
+def _openai_client(api_key: Optional[str]) -> openai.OpenAI:
+    """
+    Get the process-wide OpenAI client for an API key
+    
+    Args:
+        api_key: OpenAI API key
+        
+    Returns:
+        openai.OpenAI: Client shared by every agent using this key
+    """
+    return openai.OpenAI(api_key=api_key, http_client=_shared_http_client(), max_retries=0)
+
+# Attempts per provider call, including the first one
+MAX_ATTEMPTS = 5
+
+_backoff = wait_exponential_jitter(initial=1, max=30)
+
+def _is_transient(exc: BaseException) -> bool:
+    """
+    Check whether a provider error is worth retrying
+    
+    Args:
+        exc: Exception raised by the provider SDK
+        
+    Returns:
+        bool: True for rate limits, overload/server errors and connection failures
+    """
+    if isinstance(exc, (anthropic.APIConnectionError, openai.APIConnectionError)):
+        return True
+    if isinstance(exc, (anthropic.APIStatusError, openai.APIStatusError)):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+def _retry_wait(retry_state) -> float:
+    """
+    Compute the delay before the next attempt, honouring the server's retry-after header
+    
+    Args:
+        retry_state: tenacity state for the call being retried
+        
+    Returns:
+        float: Seconds to sleep
+    """
+    exc = retry_state.outcome.exception()
+    response = getattr(exc, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        try:
+            return min(float(retry_after), 60.0)
+        except (TypeError, ValueError):
+            pass
+    return _backoff(retry_state)
+
+# Retries transient provider failures; the SDKs' own retries are disabled so attempts don't
+# multiply, which means every synchronous and async provider call must be wrapped with this
+_retry_transient = retry(
+    retry=retry_if_exception(_is_transient),
+    wait=_retry_wait,
+    stop=stop_after_attempt(MAX_ATTEMPTS),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True
+)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "ai-auto-upgrade", "responses.sqlite3")
+
+# Seconds a cached response is served for; models and advisories move on, so answers go stale
+DEFAULT_CACHE_TTL = 7 * 24 * 3600
+
+class ResponseCache:
+    def __init__(self,
+                 path: str = DEFAULT_CACHE_PATH,
+                 ttl: Optional[float] = DEFAULT_CACHE_TTL,
+                 semantic_threshold: Optional[float] = None,
+                 embedding_model: str = "all-MiniLM-L6-v2"):
+        """
+        Initialize the response cache
+        
+        Responses are always looked up by an exact hash of the prompt, first in
+        memory and then in sqlite, so repeated prompts within a run never hit
+        the database twice. When semantic_threshold is set and sentence-transformers is installed, a miss
+        falls back to the most similar cached prompt for the same model,
+        temperature and response budget. Semantic matching is off by default
+        because prompts that differ only in version numbers embed almost
+        identically. Responses older than ttl are neither served nor kept.
+        
+        Args:
+            path: Path to the sqlite database
+            ttl: Seconds a response stays valid (None keeps responses forever)
+            semantic_threshold: Minimum cosine similarity for a semantic hit (None disables it)
+            embedding_model: sentence-transformers model used for semantic matching
+        """
+        self.path = path
+        self.ttl = ttl
+        self.semantic_threshold = semantic_threshold
+        self.embedding_model = embedding_model
+        self._lock = threading.Lock()
+        self._encoder = None
+        self._index = None
+        self._memory: Dict[str, Tuple[str, float]] = {}
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        
+        # Tables from before responses were keyed by budget and timestamped can't be hit anymore
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        if columns and not {"max_tokens", "created_at"} <= columns:
+            self._conn.execute("DROP TABLE responses")
+            
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                temperature REAL NOT NULL,
+                max_tokens INTEGER NOT NULL,
+                response TEXT NOT NULL,
+                embedding TEXT,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (self._oldest_valid(),))
+        self._conn.commit()
+        
+    @staticmethod
+    def make_key(model: str, prompt: str, temperature: float, max_tokens: int) -> str:
+        """
+        Build the exact-match cache key for a request
+        
+        The budget is part of the key, since a response truncated under a small
+        budget must not answer a request allowed to run longer.
+        
+        Args:
+            model: Model name
+            prompt: Rendered prompt
+            temperature: Sampling temperature
+            max_tokens: Response budget of the request
+            
+        Returns:
+            str: Cache key
+        """
+        return hashlib.sha1(f"{model}{prompt}{temperature}:{max_tokens}".encode()).hexdigest()
+        
+    def _oldest_valid(self) -> float:
+        """
+        Get the creation time before which cached responses have expired
+        
+        Returns:
+            float: Unix timestamp (0 when responses don't expire)
+        """
+        return time.time() - self.ttl if self.ttl is not None else 0.0
+        
+    def _embed(self, prompt: str):
+        """
+        Embed a prompt for semantic matching
+        
+        Args:
+            prompt: Rendered prompt
+            
+        Returns:
+            Normalized embedding vector, or None if semantic matching is unavailable
+        """
+        if self.semantic_threshold is None:
+            return None
+            
+        if self._encoder is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                self.semantic_threshold = None
+                return None
+            self._encoder = SentenceTransformer(self.embedding_model)
+            
+        return self._encoder.encode(prompt, normalize_embeddings=True)
+        
+    def _load_index(self) -> Dict:
+        """
+        Load stored embeddings into memory, grouped by model, temperature and budget
+        
+        Returns:
+            Dict: Mapping of (model, temperature, max_tokens) to lists of (embedding, response, created_at)
+        """
+        if self._index is None:
+            import numpy as np
+            
+            self._index = {}
+            rows = self._conn.execute(
+                "SELECT model, temperature, max_tokens, response, embedding, created_at FROM responses "
+                "WHERE embedding IS NOT NULL"
+            )
+            for model, temperature, max_tokens, response, embedding, created_at in rows:
+                vector = np.asarray(json.loads(embedding), dtype="float32")
+                self._index.setdefault((model, temperature, max_tokens), []).append((vector, response, created_at))
+                
+        return self._index
+        
+    def get(self, model: str, prompt: str, temperature: float, max_tokens: int) -> Optional[str]:
+        """
+        Look up a cached response
+        
+        Args:
+            model: Model name
+            prompt: Rendered prompt
+            temperature: Sampling temperature
+            max_tokens: Response budget of the request
+            
+        Returns:
+            Optional[str]: Cached response, or None on a miss
+        """
+        key = self.make_key(model, prompt, temperature, max_tokens)
+        oldest_valid = self._oldest_valid()
+        
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] >= oldest_valid:
+                return entry[0]
+                
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ? AND created_at >= ?",
+                (key, oldest_valid)
+            ).fetchone()
+            if row:
+                self._memory[key] = row
+                return row[0]
+                
+            embedding = self._embed(prompt)
+            if embedding is None:
+                return None
+                
+            best_score, best_response = 0.0, None
+            for vector, response, created_at in self._load_index().get((model, temperature, max_tokens), []):
+                if created_at < oldest_valid:
+                    continue
+                score = float(vector @ embedding)
+                if score > best_score:
+                    best_score, best_response = score, response
+                    
+            if best_score >= self.semantic_threshold:
+                return best_response
+            return None
+            
+    def update(self, model: str, prompt: str, temperature: float, max_tokens: int, response: str) -> None:
+        """
+        Store a response in the cache
+        
+        Args:
+            model: Model name
+            prompt: Rendered prompt
+            temperature: Sampling temperature
+            max_tokens: Response budget of the request
+            response: Model response
+        """
+        key = self.make_key(model, prompt, temperature, max_tokens)
+        created_at = time.time()
+        
+        with self._lock:
+            embedding = self._embed(prompt)
+            serialized = json.dumps([float(x) for x in embedding]) if embedding is not None else None
+            
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, temperature, max_tokens, response, embedding, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, temperature, max_tokens, response, serialized, created_at)
+            )
+            self._conn.commit()
+            self._memory[key] = (response, created_at)
+            
+            if embedding is not None and self._index is not None:
+                self._index.setdefault((model, temperature, max_tokens), []).append((embedding, response, created_at))
+                
+    def clear(self) -> None:
+        """
+        Remove all cached responses
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._index = None
+            self._memory.clear()
+
+def cached(method):
+    """
+    Serve send_message/send_message_async results from the agent's ResponseCache
+    
+    The async wrapper runs the sqlite lookups in a worker thread so they don't
+    block the event loop.
+    
+    Args:
+        method: Method taking (messages, temperature, max_tokens) and returning the response text
+        
+    Returns:
+        Wrapped method that checks the cache before calling the provider
+    """
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, messages, temperature: float = 0.7, max_tokens: int = DEFAULT_MAX_TOKENS):
+            if self.cache is None:
+                return await method(self, messages, temperature, max_tokens)
+                
+            prompt = self._cache_prompt(messages)
+            response = await asyncio.to_thread(self.cache.get, self.model, prompt, temperature, max_tokens)
+            if response is None:
+                response = await method(self, messages, temperature, max_tokens)
+                await asyncio.to_thread(self.cache.update, self.model, prompt, temperature, max_tokens, response)
+            return response
+            
+        return async_wrapper
+        
+    @functools.wraps(method)
+    def wrapper(self, messages, temperature: float = 0.7, max_tokens: int = DEFAULT_MAX_TOKENS):
+        if self.cache is None:
+            return method(self, messages, temperature, max_tokens)
+            
+        prompt = self._cache_prompt(messages)
+        response = self.cache.get(self.model, prompt, temperature, max_tokens)
+        if response is None:
+            response = method(self, messages, temperature, max_tokens)
+            self.cache.update(self.model, prompt, temperature, max_tokens, response)
+        return response
+        
+    return wrapper
+
+# Static prompt instructions, sent ahead of the per-request data so providers
+# can reuse the cached prefix across calls
+_UPGRADE_STRATEGY_INSTRUCTIONS = """
+        Please analyze the project and its dependencies given below to suggest an upgrade strategy.
+        
+        For each dependency, please provide:
+        1. Risk assessment (High/Medium/Low)
+        2. Recommended version to upgrade to
+        3. Potential breaking changes to be aware of
+        4. Suggested testing approach
+        5. Implementation strategy
+        
+        Prioritize security-critical updates and minimize breaking changes.
+        """
+
+_PREDICT_CODE_CHANGES_INSTRUCTIONS = """
+        Please predict the necessary code changes for the dependency upgrade given below,
+        based on the examples of how the dependency is currently used in the codebase.
+        
+        Please provide:
+        1. Specific code modifications needed
+        2. Any API changes between versions
+        3. Deprecated methods or classes to be aware of
+        4. Suggested replacement patterns
+        """
+
+_GENERATE_TEST_CASES_INSTRUCTIONS = """
+        Please generate test cases to validate the dependency upgrade given below.
+        
+        Please provide:
+        1. Unit tests for critical functionality
+        2. Integration tests for component interactions
+        3. Edge cases that should be tested
+        4. Test assertions to verify correct behavior
+        
+        Format the tests as executable code that can be directly added to the test suite.
+        """
+
+_PR_DESCRIPTION_INSTRUCTIONS = """
+        Please create a comprehensive pull request description for the dependency upgrades given below.
+        
+        The PR description should include:
+        1. A clear summary of the changes
+        2. Motivation for the upgrades (security, features, etc.)
+        3. Potential risks and mitigations
+        4. Testing performed
+        5. Any manual verification steps needed
+        
+        Format the description in Markdown for GitHub.
+        """
+
+def _dumps(value) -> str:
+    """
+    Serialize prompt data as indented JSON with sorted keys
+    
+    A stable rendering keeps identical requests byte-identical, which the
+    provider prompt cache and the ResponseCache both depend on.
+    
+    Args:
+        value: JSON-like data; unsupported values are rendered with str()
+        
+    Returns:
+        str: The serialized data
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            value,
+            default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        ).decode()
+    return json.dumps(value, default=str, indent=2, sort_keys=True, ensure_ascii=False)
+
+# Templates for the per-request data following the instructions above
+_UPGRADE_STRATEGY_HEAD = """
+        Project Information:
+        {project_info}
+        
+        Dependencies:
+        {dependencies}
+        """
+
+_UPGRADE_STRATEGY_CODE_SAMPLES = """
+            Code Samples:
+            {code_samples}
+            """
+
+_PREDICT_CODE_CHANGES_TEMPLATE = """
+        Upgrade {dependency_name} from version {current_version} to {target_version}.
+        
+        Here are examples of how the dependency is currently used in the codebase:
+        
+        ```
+        {api_usage_examples}
+        ```
+        """
+
+_GENERATE_TEST_CASES_HEAD = """
+        Dependency being upgraded: {dependency_name}
+        
+        The following APIs have changed or need special attention:
+        {changed_apis}
+        """
+
+_GENERATE_TEST_CASES_EXAMPLES = """
+            Here are examples of existing tests:
+            
+            ```
+            {existing_test_examples}
+            ```
+            """
+
+_PR_DESCRIPTION_TEMPLATE = """
+        Dependencies being updated:
+        {dependency_updates}
+        
+        Code changes implemented:
+        {code_changes}
+        
+        Test results:
+        {test_results}
+        """
+
+@dataclass(slots=True)
+class Message:
     role: str
     content: str
+    # Static text placed before content and marked as a cacheable prompt prefix
+    instructions: Optional[str] = None
+    
+    @classmethod
+    def model_validate(cls, data: Union[Dict, "Message"]) -> "Message":
+        """
+        Build a message from a dict (kept for callers of the former Pydantic model)
+        
+        Args:
+            data: Message fields or an existing message
+            
+        Returns:
+            Message: The message
+        """
+        if isinstance(data, cls):
+            return data
+        return cls(**data)
+        
+    def _as_dict(self) -> Dict:
+        """
+        Get the message in the plain role/content request format
+        
+        Returns:
+            Dict: Role and content of the message
+        """
+        return {"role": self.role, "content": self.content}
 
 class AIAgent:
-    def __init__(self, use_claude: bool = True):
+    def __init__(self,
+                 use_claude: bool = True,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 cache: Optional[ResponseCache] = None,
+                 use_cache: bool = False,
+                 use_batch: bool = False):
         """
         Initialize the AI Agent with either Claude or OpenAI
         
         Args:
             use_claude (bool): If True, use Claude API, otherwise use OpenAI
+            max_concurrency (int): Maximum number of concurrent requests in analyze_many
+            cache (ResponseCache): Response cache to use (defaults to the on-disk cache)
+            use_cache (bool): If True, serve repeated prompts from the cache; off by default,
+                so a re-run after a failed upgrade gets a fresh plan
+            use_batch (bool): If True, send_message goes through the provider's batch API,
+                which is billed at half price but can take up to 24 hours per call
         """
         self.use_claude = use_claude
+        self.max_concurrency = max_concurrency
+        self.use_batch = use_batch
+        self.cache = (cache or ResponseCache()) if use_cache else None
         
         if use_claude:
-            self.client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+            self.client = _anthropic_client(os.getenv("ANTHROPIC_API_KEY"))
+            # Async clients hold loop-bound connections, so each agent keeps its own
+            self.async_client = anthropic.AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"), max_retries=0)
             self.model = "claude-3-opus-20240229"
         else:
-            self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            self.client = _openai_client(os.getenv("OPENAI_API_KEY"))
+            self.async_client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
             self.model = "gpt-4-turbo"
             
         self.system_prompt = """
@@ -41,47 +598,370 @@ class AIAgent:
         Be precise, technical, and focus on providing actionable insights.
         """
         
-    def send_message(self, messages: List[Message], temperature: float = 0.7) -> str:
+        # Claude caches the system prompt as a prompt prefix shared by every call
+        self._claude_system = [
+            {"type": "text", "text": self.system_prompt, "cache_control": {"type": "ephemeral"}}
+        ]
+        
+    def _format_messages(self, messages: List[Message]) -> List[Dict]:
+        """
+        Format messages for the selected provider
+        
+        Args:
+            messages: List of messages in the conversation
+            
+        Returns:
+            List[Dict]: Messages in the provider's request format
+        """
+        if self.use_claude:
+            formatted_messages = []
+            for msg in messages:
+                if not msg.instructions:
+                    formatted_messages.append(msg._as_dict())
+                    continue
+                content = [
+                    {"type": "text", "text": msg.instructions, "cache_control": {"type": "ephemeral"}},
+                    {"type": "text", "text": msg.content}
+                ]
+                formatted_messages.append({"role": msg.role, "content": content})
+            return formatted_messages
+            
+        # OpenAI caches long shared prefixes automatically, so keep the static part first
+        formatted_messages = [{"role": "system", "content": self.system_prompt}]
+        formatted_messages.extend([
+            {"role": msg.role, "content": msg.instructions + msg.content} if msg.instructions else msg._as_dict()
+            for msg in messages
+        ])
+        return formatted_messages
+        
+    def _cache_prompt(self, messages: List[Message]) -> str:
+        """
+        Render a conversation into the string used for response caching
+        
+        Args:
+            messages: List of messages in the conversation
+            
+        Returns:
+            str: Stable serialization of the system prompt and messages
+        """
+        return json.dumps([self.system_prompt, self._format_messages(messages)], sort_keys=True)
+        
+    @cached
+    def send_message(self,
+                     messages: List[Message],
+                     temperature: float = 0.7,
+                     max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
         """
         Send a message to the AI model and get a response
         
         Args:
             messages: List of messages in the conversation
             temperature: Controls randomness (0.0 = deterministic, 1.0 = creative)
+            max_tokens: Upper bound on the length of the response
             
         Returns:
             str: The model's response
         """
+        if self.use_batch:
+            return self._send_via_batch(messages, temperature, max_tokens)
+            
+        response = self._create(self._request_body(messages, temperature, max_tokens))
+        
         if self.use_claude:
-            formatted_messages = [
-                {"role": msg.role, "content": msg.content} for msg in messages
-            ]
-            
-            response = self.client.messages.create(
-                model=self.model,
-                system=self.system_prompt,
-                messages=formatted_messages,
-                temperature=temperature,
-                max_tokens=4000
-            )
             return response.content[0].text
         else:
-            # Format messages for OpenAI
-            formatted_messages = [{"role": "system", "content": self.system_prompt}]
-            formatted_messages.extend([{"role": msg.role, "content": msg.content} for msg in messages])
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=formatted_messages,
-                temperature=temperature,
-                max_tokens=4000
-            )
             return response.choices[0].message.content
+            
+    @_retry_transient
+    def _create(self, request_body: Dict, stream: bool = False):
+        """
+        Issue one provider create call, retrying transient failures
+        
+        Args:
+            request_body: Keyword arguments built by _request_body
+            stream: If True, return the provider's event stream instead of the full response
+            
+        Returns:
+            The provider's response object, or its stream when streaming
+        """
+        if self.use_claude:
+            return self.client.messages.create(**request_body, stream=stream)
+        return self.client.chat.completions.create(**request_body, stream=stream)
+        
+    def _request_body(self,
+                      messages: List[Message],
+                      temperature: float = 0.7,
+                      max_tokens: int = DEFAULT_MAX_TOKENS) -> Dict:
+        """
+        Build the provider request parameters for a conversation
+        
+        Args:
+            messages: List of messages in the conversation
+            temperature: Controls randomness (0.0 = deterministic, 1.0 = creative)
+            max_tokens: Upper bound on the length of the response
+            
+        Returns:
+            Dict: Keyword arguments for the provider's create call
+        """
+        request_body = {
+            "model": self.model,
+            "messages": self._format_messages(messages),
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if self.use_claude:
+            request_body["system"] = self._claude_system
+        return request_body
+        
+    @_retry_transient
+    def submit_batch(self,
+                     jobs: List[Tuple[str, List[Message]]],
+                     temperature: float = 0.7,
+                     max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+        """
+        Submit independent conversations as one provider batch job
+        
+        Batch jobs finish within 24 hours and are billed at half the token price,
+        which suits non-interactive runs such as nightly upgrade scans.
+        
+        Args:
+            jobs: (custom_id, messages) pairs; custom_id identifies each result
+            temperature: Controls randomness (0.0 = deterministic, 1.0 = creative)
+            max_tokens: Upper bound on the length of the response
+            
+        Returns:
+            str: ID of the submitted batch
+        """
+        if self.use_claude:
+            batch = self.client.messages.batches.create(requests=[
+                {"custom_id": custom_id, "params": self._request_body(messages, temperature, max_tokens)}
+                for custom_id, messages in jobs
+            ])
+            return batch.id
+            
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._request_body(messages, temperature, max_tokens)
+            })
+            for custom_id, messages in jobs
+        ]
+        input_file = self.client.files.create(
+            file=("batch.jsonl", io.BytesIO("\n".join(lines).encode("utf-8"))),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+        
+    @_retry_transient
+    def poll_batch(self, batch_id: str) -> Dict:
+        """
+        Check the status of a batch job
+        
+        Args:
+            batch_id: ID returned by submit_batch
+            
+        Returns:
+            Dict: Provider status and whether the batch has finished processing
+        """
+        if self.use_claude:
+            batch = self.client.messages.batches.retrieve(batch_id)
+            return {"status": batch.processing_status, "done": batch.processing_status == "ended"}
+            
+        batch = self.client.batches.retrieve(batch_id)
+        return {
+            "status": batch.status,
+            "done": batch.status in ("completed", "failed", "expired", "cancelled")
+        }
+        
+    @_retry_transient
+    def fetch_batch_results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        """
+        Get the responses of a finished batch job
+        
+        Args:
+            batch_id: ID returned by submit_batch
+            
+        Returns:
+            Dict[str, Optional[str]]: Response text keyed by custom_id (None for failed requests)
+        """
+        results = {}
+        
+        if self.use_claude:
+            for entry in self.client.messages.batches.results(batch_id):
+                if entry.result.type == "succeeded":
+                    results[entry.custom_id] = entry.result.message.content[0].text
+                else:
+                    results[entry.custom_id] = None
+            return results
+            
+        batch = self.client.batches.retrieve(batch_id)
+        if not batch.output_file_id:
+            return results
+            
+        for line in self.client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get("response") or {}
+            if entry.get("error") or response.get("status_code") != 200:
+                results[entry["custom_id"]] = None
+            else:
+                results[entry["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        return results
+        
+    def _send_via_batch(self,
+                        messages: List[Message],
+                        temperature: float = 0.7,
+                        max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+        """
+        Send a single conversation through the batch API and wait for the response
+        
+        Each provider call retries on its own, so a transient error while polling
+        never submits (and pays for) the request a second time.
+        
+        Args:
+            messages: List of messages in the conversation
+            temperature: Controls randomness (0.0 = deterministic, 1.0 = creative)
+            max_tokens: Upper bound on the length of the response
+            
+        Returns:
+            str: The model's response
+        """
+        batch_id = self.submit_batch([("request-0", messages)], temperature, max_tokens)
+        
+        while not self.poll_batch(batch_id)["done"]:
+            time.sleep(BATCH_POLL_INTERVAL)
+            
+        response = self.fetch_batch_results(batch_id).get("request-0")
+        if response is None:
+            raise RuntimeError(f"Batch request {batch_id} did not succeed")
+        return response
+            
+    def stream_message(self,
+                       messages: List[Message],
+                       temperature: float = 0.7,
+                       max_tokens: int = DEFAULT_MAX_TOKENS) -> Iterator[str]:
+        """
+        Send a message to the AI model and yield the response as it is generated
+        
+        Args:
+            messages: List of messages in the conversation
+            temperature: Controls randomness (0.0 = deterministic, 1.0 = creative)
+            max_tokens: Upper bound on the length of the response
+            
+        Returns:
+            Iterator[str]: Text chunks of the model's response
+        """
+        # Only opening the stream is retried; chunks already yielded can't be taken back
+        with self._create(self._request_body(messages, temperature, max_tokens), stream=True) as events:
+            for event in events:
+                if self.use_claude:
+                    if event.type == "content_block_delta" and event.delta.type == "text_delta":
+                        yield event.delta.text
+                elif event.choices:
+                    yield event.choices[0].delta.content or ""
+                    
+    def _respond(self,
+                 messages: List[Message],
+                 temperature: float = 0.7,
+                 max_tokens: int = DEFAULT_MAX_TOKENS,
+                 stream: bool = False) -> Union[str, Iterator[str]]:
+        """
+        Route a request to send_message or stream_message
+        
+        Args:
+            messages: List of messages in the conversation
+            temperature: Controls randomness (0.0 = deterministic, 1.0 = creative)
+            max_tokens: Upper bound on the length of the response
+            stream: If True, return an iterator of text chunks instead of the full response
+            
+        Returns:
+            Union[str, Iterator[str]]: The model's response, or its text chunks when streaming
+        """
+        if stream:
+            return self.stream_message(messages, temperature, max_tokens)
+        return self.send_message(messages, temperature, max_tokens)
+            
+    @cached
+    @_retry_transient
+    async def send_message_async(self,
+                                 messages: List[Message],
+                                 temperature: float = 0.7,
+                                 max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+        """
+        Send a message to the AI model without blocking the event loop
+        
+        Args:
+            messages: List of messages in the conversation
+            temperature: Controls randomness (0.0 = deterministic, 1.0 = creative)
+            max_tokens: Upper bound on the length of the response
+            
+        Returns:
+            str: The model's response
+        """
+        request_body = self._request_body(messages, temperature, max_tokens)
+        
+        if self.use_claude:
+            response = await self.async_client.messages.create(**request_body)
+            return response.content[0].text
+        else:
+            response = await self.async_client.chat.completions.create(**request_body)
+            return response.choices[0].message.content
+            
+    async def analyze_many(self,
+                           batched_messages: List[List[Message]],
+                           temperature: float = 0.7,
+                           max_concurrency: Optional[int] = None) -> List[str]:
+        """
+        Send several independent conversations concurrently
+        
+        Args:
+            batched_messages: One list of messages per conversation
+            temperature: Controls randomness (0.0 = deterministic, 1.0 = creative)
+            max_concurrency: Maximum number of in-flight requests (defaults to the agent setting)
+            
+        Returns:
+            List[str]: The model's responses, in the same order as batched_messages
+        """
+        # Created per call so the semaphore is bound to the running event loop
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        
+        async def _bounded(messages: List[Message]) -> str:
+            async with semaphore:
+                return await self.send_message_async(messages, temperature)
+                
+        return await asyncio.gather(*[_bounded(messages) for messages in batched_messages])
+        
+    def analyze_many_sync(self,
+                          batched_messages: List[List[Message]],
+                          temperature: float = 0.7,
+                          max_concurrency: Optional[int] = None) -> List[str]:
+        """
+        Synchronous wrapper around analyze_many for non-async callers
+        
+        Args:
+            batched_messages: One list of messages per conversation
+            temperature: Controls randomness (0.0 = deterministic, 1.0 = creative)
+            max_concurrency: Maximum number of in-flight requests (defaults to the agent setting)
+            
+        Returns:
+            List[str]: The model's responses, in the same order as batched_messages
+        """
+        return asyncio.run(self.analyze_many(batched_messages, temperature, max_concurrency))
 
     def analyze_upgrade_strategy(self, 
                                project_info: Dict,
                                dependencies: List[Dict],
-                               code_samples: Optional[List[str]] = None) -> str:
+                               code_samples: Optional[List[str]] = None,
+                               stream: bool = False,
+                               max_tokens: int = _BUDGETS["analyze"]) -> Union[str, Iterator[str]]:
         """
         Analyze dependencies and suggest an upgrade strategy
         
@@ -89,46 +969,30 @@ class AIAgent:
             project_info: Information about the project
             dependencies: List of dependencies with current and available versions
             code_samples: Representative code samples using the dependencies
+            stream: If True, yield the response in chunks as it is generated
+            max_tokens: Upper bound on the length of the response
             
         Returns:
-            str: Upgrade strategy recommendations
+            Union[str, Iterator[str]]: Upgrade strategy recommendations
         """
-        prompt = f"""
-        Please analyze the following project and its dependencies to suggest an upgrade strategy:
-        
-        Project Information:
-        {project_info}
-        
-        Dependencies:
-        {dependencies}
-        
-        """
-        
+        parts = [_UPGRADE_STRATEGY_HEAD.format_map({
+            "project_info": _dumps(project_info),
+            "dependencies": _dumps(dependencies)
+        })]
         if code_samples:
-            prompt += f"""
-            Code Samples:
-            {code_samples}
-            """
+            parts.append(_UPGRADE_STRATEGY_CODE_SAMPLES.format_map({"code_samples": code_samples}))
+        prompt = "".join(parts)
             
-        prompt += """
-        For each dependency, please provide:
-        1. Risk assessment (High/Medium/Low)
-        2. Recommended version to upgrade to
-        3. Potential breaking changes to be aware of
-        4. Suggested testing approach
-        5. Implementation strategy
-        
-        Prioritize security-critical updates and minimize breaking changes.
-        """
-        
-        messages = [Message(role="user", content=prompt)]
-        return self.send_message(messages)
+        messages = [Message(role="user", content=prompt, instructions=_UPGRADE_STRATEGY_INSTRUCTIONS)]
+        return self._respond(messages, max_tokens=max_tokens, stream=stream)
     
     def predict_code_changes(self, 
                            dependency_name: str,
                            current_version: str,
                            target_version: str,
-                           api_usage_examples: List[str]) -> str:
+                           api_usage_examples: List[str],
+                           stream: bool = False,
+                           max_tokens: int = _BUDGETS["predict"]) -> Union[str, Iterator[str]]:
         """
         Predict necessary code changes for a dependency upgrade
         
@@ -137,33 +1001,28 @@ class AIAgent:
             current_version: Current version
             target_version: Target version for upgrade
             api_usage_examples: Examples of how the API is currently used
+            stream: If True, yield the response in chunks as it is generated
+            max_tokens: Upper bound on the length of the response
             
         Returns:
-            str: Predicted code changes
-        """
-        prompt = f"""
-        Please predict the necessary code changes to upgrade {dependency_name} from version {current_version} to {target_version}.
-        
-        Here are examples of how the dependency is currently used in the codebase:
-        
-        ```
-        {api_usage_examples}
-        ```
-        
-        Please provide:
-        1. Specific code modifications needed
-        2. Any API changes between versions
-        3. Deprecated methods or classes to be aware of
-        4. Suggested replacement patterns
+            Union[str, Iterator[str]]: Predicted code changes
         """
+        prompt = _PREDICT_CODE_CHANGES_TEMPLATE.format_map({
+            "dependency_name": dependency_name,
+            "current_version": current_version,
+            "target_version": target_version,
+            "api_usage_examples": api_usage_examples
+        })
         
-        messages = [Message(role="user", content=prompt)]
-        return self.send_message(messages)
+        messages = [Message(role="user", content=prompt, instructions=_PREDICT_CODE_CHANGES_INSTRUCTIONS)]
+        return self._respond(messages, max_tokens=max_tokens, stream=stream)
     
     def generate_test_cases(self,
                           dependency_name: str,
                           changed_apis: List[Dict],
-                          existing_test_examples: Optional[List[str]] = None) -> str:
+                          existing_test_examples: Optional[List[str]] = None,
+                          stream: bool = False,
+                          max_tokens: int = _BUDGETS["tests"]) -> Union[str, Iterator[str]]:
         """
         Generate test cases for validating a dependency upgrade
         
@@ -171,43 +1030,29 @@ class AIAgent:
             dependency_name: Name of the dependency
             changed_apis: List of APIs that changed in the upgrade
             existing_test_examples: Examples of existing tests
+            stream: If True, yield the response in chunks as it is generated
+            max_tokens: Upper bound on the length of the response
             
         Returns:
-            str: Generated test cases
+            Union[str, Iterator[str]]: Generated test cases
         """
-        prompt = f"""
-        Please generate test cases to validate the upgrade of {dependency_name}.
-        
-        The following APIs have changed or need special attention:
-        {changed_apis}
-        """
-        
+        parts = [_GENERATE_TEST_CASES_HEAD.format_map({
+            "dependency_name": dependency_name,
+            "changed_apis": _dumps(changed_apis)
+        })]
         if existing_test_examples:
-            prompt += f"""
-            Here are examples of existing tests:
-            
-            ```
-            {existing_test_examples}
-            ```
-            """
+            parts.append(_GENERATE_TEST_CASES_EXAMPLES.format_map({"existing_test_examples": existing_test_examples}))
+        prompt = "".join(parts)
             
-        prompt += """
-        Please provide:
-        1. Unit tests for critical functionality
-        2. Integration tests for component interactions
-        3. Edge cases that should be tested
-        4. Test assertions to verify correct behavior
-        
-        Format the tests as executable code that can be directly added to the test suite.
-        """
-        
-        messages = [Message(role="user", content=prompt)]
-        return self.send_message(messages, temperature=0.2)  # Lower temperature for more precise code
+        messages = [Message(role="user", content=prompt, instructions=_GENERATE_TEST_CASES_INSTRUCTIONS)]
+        return self._respond(messages, temperature=0.2, max_tokens=max_tokens, stream=stream)  # Lower temperature for more precise code
     
     def create_pr_description(self,
                             dependency_updates: List[Dict],
                             code_changes: Dict,
-                            test_results: Dict) -> str:
+                            test_results: Dict,
+                            stream: bool = False,
+                            max_tokens: int = _BUDGETS["pr"]) -> Union[str, Iterator[str]]:
         """
         Generate a pull request description for dependency upgrades
         
@@ -215,31 +1060,32 @@ class AIAgent:
             dependency_updates: List of dependencies being updated
             code_changes: Summary of code changes made
             test_results: Results of validation tests
+            stream: If True, yield the response in chunks as it is generated
+            max_tokens: Upper bound on the length of the response
             
         Returns:
-            str: Formatted pull request description
+            Union[str, Iterator[str]]: Formatted pull request description
         """
-        prompt = f"""
-        Please create a comprehensive pull request description for the following dependency upgrades:
+        prompt = _PR_DESCRIPTION_TEMPLATE.format_map({
+            "dependency_updates": _dumps(dependency_updates),
+            "code_changes": _dumps(code_changes),
+            "test_results": _dumps(test_results)
+        })
         
-        Dependencies being updated:
-        {dependency_updates}
-        
-        Code changes implemented:
-        {code_changes}
-        
-        Test results:
-        {test_results}
-        
-        The PR description should include:
-        1. A clear summary of the changes
-        2. Motivation for the upgrades (security, features, etc.)
-        3. Potential risks and mitigations
-        4. Testing performed
-        5. Any manual verification steps needed
-        
-        Format the description in Markdown for GitHub.
-        """
+        messages = [Message(role="user", content=prompt, instructions=_PR_DESCRIPTION_INSTRUCTIONS)]
+        return self._respond(messages, max_tokens=max_tokens, stream=stream)
+
+@functools.lru_cache(maxsize=None)
+def get_agent(use_claude: bool = True, use_batch: bool = False, use_cache: bool = False) -> AIAgent:
+    """
+    Get a shared AI Agent for the given provider
+    
+    Args:
+        use_claude (bool): If True, use Claude API, otherwise use OpenAI
+        use_batch (bool): If True, send requests through the provider's batch API
+        use_cache (bool): If True, serve repeated prompts from the on-disk response cache
         
-        messages = [Message(role="user", content=prompt)]
-        return self.send_message(messages)
+    Returns:
+        AIAgent: Agent instance shared by all callers in the process
+    """
+    return AIAgent(use_claude=use_claude, use_cache=use_cache, use_batch=use_batch)
@@ -1,21 +1,760 @@
 # code_impact_analyzer.py
 import os
 import re
-import ast
 import json
-from typing import Dict, List, Optional, Set, Tuple
+import bisect
+import mmap
+import shutil
+import functools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
 import subprocess
-from git import Repo
+from packaging import version
+
+try:
+    import ahocorasick
+except ImportError:
+    # pyahocorasick is an optional accelerator; fall back to a combined regex
+    ahocorasick = None
+
+try:
+    import orjson
+except ImportError:
+    # orjson is an optional accelerator; fall back to the standard library
+    orjson = None
+
+# Both parsers accept bytes, so subprocess output and cache files need no decoding step
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Below this many files, scanning in-process is faster than starting a pool
+_PARALLEL_SCAN_MIN_FILES = 64
+
+# Upper bound on scan workers; more than this only adds contention on the file system
+_MAX_SCAN_WORKERS = min(32, os.cpu_count() or 1)
+
+_JAVA_IMPORT_RE = re.compile(rb"import\s+([^;]+);")
+_JAVA_IMPORT_TEXT_RE = re.compile(r"import\s+([^;]+);")
+
+# JDK packages are imported by nearly every file and never belong to a Maven artifact's
+# package tree unless the artifact's own groupId lives there (e.g. javax.servlet)
+JDK_IMPORT_DENYLIST = frozenset({"java", "javax", "jdk", "sun", "com.sun"})
+
+# Directories pruned while collecting sources; build output, VCS, IDE and
+# environment directories never hold first-party code
+_JS_SKIP_DIRS = frozenset({".git", "node_modules"})
+_PYTHON_SKIP_DIRS = frozenset({".git", "venv", ".venv", "__pycache__"})
+_JAVA_SKIP_DIRS = frozenset({".git", "build", "target", "node_modules", ".idea", "out"})
+
+_JS_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx")
+_PYTHON_EXTENSIONS = (".py",)
+
+# Minified bundles and type declarations never hold first-party imports worth reporting
+_JS_GENERATED_SUFFIXES = (".min.js", ".d.ts")
+
+# JS files above this size are bundles or generated output, not hand-written modules
+_JS_MAX_FILE_SIZE = 8 * 1024 * 1024
+
+# A NUL byte in the first block of a file marks it as binary
+_BINARY_SNIFF_BYTES = 4096
+_JAVA_EXTENSIONS = (".java", ".kt", ".scala")
+
+_POSIX_REGEX_SPECIAL_RE = re.compile(r"([.\[\]()*+?{}|^$\\])")
+
+# Published package versions are immutable, so fetched release lists are kept on disk
+NPM_VERSIONS_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ai-auto-upgrade", "npm")
+
+@functools.lru_cache(maxsize=16)
+def _candidate_matcher(package_name_candidates: Tuple[str, ...]) -> Callable[[str], bool]:
+    """
+    Build a case-insensitive matcher for any of the package name candidates
+    
+    All candidates are matched in a single pass over the text, using an
+    Aho-Corasick automaton when pyahocorasick is installed. The matcher is
+    built once per process for a given set of candidates.
+    
+    Args:
+        package_name_candidates: Package name fragments identifying the dependency
+        
+    Returns:
+        Callable[[str], bool]: Function returning True if the text contains any candidate
+    """
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for candidate in package_name_candidates:
+            automaton.add_word(candidate.lower(), candidate)
+        automaton.make_automaton()
+        return lambda text: next(automaton.iter(text.lower()), None) is not None
+        
+    pattern = re.compile("|".join(re.escape(c) for c in package_name_candidates), re.IGNORECASE)
+    return lambda text: pattern.search(text) is not None
+
+def _is_denied_import(import_stmt: str, deny_prefixes: Tuple[str, ...]) -> bool:
+    """
+    Check whether an import statement falls under a denied package prefix
+    
+    Args:
+        import_stmt: Imported name, optionally starting with "static"
+        deny_prefixes: Denied package prefixes, each ending with "."
+        
+    Returns:
+        bool: True if the import should be ignored
+    """
+    if not deny_prefixes:
+        return False
+    if import_stmt.startswith("static "):
+        import_stmt = import_stmt[7:].lstrip()
+    return import_stmt.startswith(deny_prefixes)
+
+def _scan_java_file(file_path: str,
+                    relative_path: str,
+                    package_name_candidates: Tuple[str, ...],
+                    deny_prefixes: Tuple[str, ...] = (),
+                    files_only: bool = False) -> List[Dict]:
+    """
+    Find import statements referencing any package name candidate in a Java file
+    
+    Defined at module level so it can be dispatched to worker processes.
+    
+    Args:
+        file_path: Absolute path of the file
+        relative_path: Path of the file relative to the repository
+        package_name_candidates: Package name fragments identifying the dependency
+        deny_prefixes: Package prefixes whose imports are ignored
+        files_only: If True, stop at the first hit and return only the file
+        
+    Returns:
+        List[Dict]: Matching import statements in the file
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+                
+            # Scan the mapped bytes directly and only decode the lines that match
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                return _scan_java_content(content, relative_path, package_name_candidates, deny_prefixes, files_only)
+    except Exception:
+        # Skip files that can't be read
+        return []
+
+def _scan_java_content(content: Union[bytes, mmap.mmap],
+                       relative_path: str,
+                       package_name_candidates: Tuple[str, ...],
+                       deny_prefixes: Tuple[str, ...] = (),
+                       files_only: bool = False) -> List[Dict]:
+    """
+    Find import statements referencing any package name candidate in Java source
+    
+    Args:
+        content: Contents of the file
+        relative_path: Path of the file relative to the repository
+        package_name_candidates: Package name fragments identifying the dependency
+        deny_prefixes: Package prefixes whose imports are ignored
+        files_only: If True, stop at the first hit and return only the file
+        
+    Returns:
+        List[Dict]: Matching import statements in the file
+    """
+    matches_candidate = _candidate_matcher(package_name_candidates)
+    results = []
+    line_num = 1
+    last_pos = 0
+    
+    for match in _JAVA_IMPORT_RE.finditer(content):
+        import_stmt = match.group(1).decode('utf-8', 'ignore').strip()
+        
+        # Check if any candidate is in the import statement
+        if not matches_candidate(import_stmt) or _is_denied_import(import_stmt, deny_prefixes):
+            continue
+            
+        if files_only:
+            return [{"file": relative_path}]
+            
+        # Get line number, counting only the newlines since the previous hit
+        start = match.start()
+        line_num += content[last_pos:start].count(b'\n')
+        last_pos = start
+        
+        results.append({
+            "file": relative_path,
+            "line": line_num,
+            "context": _mapped_line(content, start).strip(),
+            "import_path": import_stmt
+        })
+        
+    return results
+
+@functools.lru_cache(maxsize=16)
+def _js_usage_pattern(dependency_name: str) -> "re.Pattern":
+    """
+    Build the bytes pattern matching imports of an npm package
+    
+    Args:
+        dependency_name: Name of the npm package
+        
+    Returns:
+        re.Pattern: Pattern whose first group is the imported module path
+    """
+    # require('x') and from 'x' in one pass; import ... from 'x' is covered by the
+    # from alternative, and the lookahead keeps require's closing paren mandatory
+    escaped_name = re.escape(dependency_name)
+    return re.compile(
+        f"(?:require\\((?=['\"][^'\"]*['\"]\\))|from )['\"]({escaped_name}(?:/[^'\"]+)?)['\"]".encode('utf-8')
+    )
+
+def _mapped_line(content: Union[bytes, mmap.mmap], position: int) -> str:
+    """
+    Decode the line of a mapped file containing a position
+    
+    Args:
+        content: Mapped or already read file contents
+        position: Byte offset within the line
+        
+    Returns:
+        str: The line, without its newline
+    """
+    line_start = content.rfind(b'\n', 0, position) + 1
+    line_end = content.find(b'\n', position)
+    if line_end == -1:
+        line_end = len(content)
+    return content[line_start:line_end].decode('utf-8', 'ignore')
+
+def _is_generated_js(file_path: str) -> bool:
+    """
+    Check whether a JavaScript/TypeScript file is build output rather than source
+    
+    Args:
+        file_path: Absolute path of the file
+        
+    Returns:
+        bool: True for minified bundles and type declarations
+    """
+    # Decided by name alone, so no file is stat'ed and hand-written sources
+    # shipping a sibling source map are still scanned
+    return file_path.endswith(_JS_GENERATED_SUFFIXES)
+
+def _scan_js_file(file_path: str,
+                  relative_path: str,
+                  dependency_name: str,
+                  files_only: bool = False) -> List[Dict]:
+    """
+    Find imports of an npm package in a JavaScript/TypeScript file
+    
+    Args:
+        file_path: Absolute path of the file
+        relative_path: Path of the file relative to the repository
+        dependency_name: Name of the npm package
+        files_only: If True, stop at the first hit and return only the file
+        
+    Returns:
+        List[Dict]: Matching imports in the file
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0 or size > _JS_MAX_FILE_SIZE:
+                return []
+                
+            # Scan the mapped bytes directly and only decode the lines that match
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                return _scan_js_content(content, relative_path, dependency_name, files_only)
+    except Exception:
+        # Skip files that can't be read
+        return []
+
+def _scan_js_content(content: Union[bytes, mmap.mmap],
+                     relative_path: str,
+                     dependency_name: str,
+                     files_only: bool = False) -> List[Dict]:
+    """
+    Find imports of an npm package in JavaScript/TypeScript source
+    
+    Args:
+        content: Contents of the file
+        relative_path: Path of the file relative to the repository
+        dependency_name: Name of the npm package
+        files_only: If True, stop at the first hit and return only the file
+        
+    Returns:
+        List[Dict]: Matching imports in the file
+    """
+    results = []
+    
+    if len(content) > _JS_MAX_FILE_SIZE or content.find(b'\0', 0, _BINARY_SNIFF_BYTES) != -1:
+        return results
+        
+    # Every pattern contains the package name, so most files are ruled out here
+    first_hit = content.find(dependency_name.encode('utf-8'))
+    if first_hit == -1:
+        return results
+        
+    line_num = 1
+    last_pos = 0
+    
+    # Every match starts on the same line as the name it contains, so nothing
+    # before the first mention can match; bundles often mention it only far down
+    scan_start = content.rfind(b'\n', 0, first_hit) + 1
+    
+    for match in _js_usage_pattern(dependency_name).finditer(content, scan_start):
+        if files_only:
+            return [{"file": relative_path}]
+            
+        # Get line number, counting only the newlines since the previous hit
+        start = match.start()
+        line_num += content[last_pos:start].count(b'\n')
+        last_pos = start
+        
+        results.append({
+            "file": relative_path,
+            "line": line_num,
+            "context": _mapped_line(content, start).strip(),
+            "import_path": match.group(1).decode('utf-8', 'ignore')
+        })
+        
+    return results
+
+@functools.lru_cache(maxsize=16)
+def _python_usage_patterns(normalized_name: str) -> List[Tuple[str, "re.Pattern"]]:
+    """
+    Build the import patterns for a Python package
+    
+    Args:
+        normalized_name: Importable package name
+        
+    Returns:
+        List[Tuple[str, re.Pattern]]: Each import form with its compiled pattern
+    """
+    usage_patterns = [
+        f"import {normalized_name}",
+        f"from {normalized_name} import",
+        f"import {normalized_name} as"
+    ]
+    # The patterns are literal text, so escape them
+    return [(pattern, re.compile(re.escape(pattern).encode('utf-8'))) for pattern in usage_patterns]
+
+@functools.lru_cache(maxsize=16)
+def _python_reference_pattern(normalized_name: str) -> "re.Pattern":
+    """
+    Build the pattern matching bare references to a Python package name
+    
+    Args:
+        normalized_name: Importable package name
+        
+    Returns:
+        re.Pattern: Bytes pattern for the name as a whole identifier
+    """
+    # Not part of a longer identifier, and not an attribute of something else (x.name)
+    return re.compile(rb"(?<![\w.])" + re.escape(normalized_name).encode('utf-8') + rb"(?!\w)")
+
+def _starts_in_comment(line: bytes, offset: int) -> bool:
+    """
+    Check whether a position on a line of Python source is inside a comment
+    
+    A '#' only starts a comment outside string literals. Quotes are tracked
+    within the line, so strings spanning lines (triple-quoted text) are not
+    seen and a '#' inside one still counts as a comment.
+    
+    Args:
+        line: Source line, starting at the beginning of the line
+        offset: Byte offset of the position within the line
+        
+    Returns:
+        bool: True if a comment starts before offset
+    """
+    quote = None
+    index = 0
+    
+    while index < offset:
+        char = line[index:index + 1]
+        if quote is not None:
+            if char == b'\\':
+                index += 1
+            elif line.startswith(quote, index):
+                index += len(quote) - 1
+                quote = None
+        elif char == b'#':
+            return True
+        elif char in (b'"', b"'"):
+            quote = char * 3 if line.startswith(char * 3, index) else char
+            index += len(quote) - 1
+        index += 1
+        
+    return False
+
+def _scan_python_file(file_path: str,
+                      relative_path: str,
+                      normalized_name: str,
+                      files_only: bool = False) -> List[Dict]:
+    """
+    Find imports of and direct references to a package in a Python file
+    
+    Args:
+        file_path: Absolute path of the file
+        relative_path: Path of the file relative to the repository
+        normalized_name: Importable package name
+        files_only: If True, stop at the first hit and return only the file
+        
+    Returns:
+        List[Dict]: Matching imports and references in the file
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+                
+            # Scan the mapped bytes directly and only decode the lines that match
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                return _scan_python_content(content, relative_path, normalized_name, files_only)
+    except Exception:
+        # Skip files that can't be read
+        return []
+
+def _scan_python_content(content: Union[bytes, mmap.mmap],
+                         relative_path: str,
+                         normalized_name: str,
+                         files_only: bool = False) -> List[Dict]:
+    """
+    Find imports of and direct references to a package in Python source
+    
+    Args:
+        content: Contents of the file
+        relative_path: Path of the file relative to the repository
+        normalized_name: Importable package name
+        files_only: If True, stop at the first hit and return only the file
+        
+    Returns:
+        List[Dict]: Matching imports and references in the file
+    """
+    results = []
+    
+    # Every pattern contains the name, so most files are ruled out here
+    first_hit = content.find(normalized_name.encode('utf-8'))
+    if first_hit == -1:
+        return results
+        
+    # No match can start before the line of the first mention
+    scan_start = content.rfind(b'\n', 0, first_hit) + 1
+    
+    for pattern, compiled_pattern in _python_usage_patterns(normalized_name):
+        line_num = 1
+        last_pos = 0
+        
+        for match in compiled_pattern.finditer(content, scan_start):
+            if files_only:
+                return [{"file": relative_path}]
+                
+            # Get line number, counting only the newlines since the previous hit
+            start = match.start()
+            line_num += content[last_pos:start].count(b'\n')
+            last_pos = start
+            
+            results.append({
+                "file": relative_path,
+                "line": line_num,
+                "context": _mapped_line(content, start).strip(),
+                "import_path": pattern
+            })
+            
+    # Also find usage of the package's functions/classes; a whole-word match
+    # outside import statements and comments stands in for an ast.Name walk,
+    # which cost a full parse of every candidate file
+    line_num = 1
+    last_pos = 0
+    
+    for match in _python_reference_pattern(normalized_name).finditer(content, scan_start):
+        start = match.start()
+        line_num += content[last_pos:start].count(b'\n')
+        last_pos = start
+        
+        # Skip import statements and names inside comments
+        line_start = content.rfind(b'\n', 0, start) + 1
+        if content.find(b'#', line_start, start) != -1 and _starts_in_comment(content[line_start:start], start - line_start):
+            continue
+        context = _mapped_line(content, start).strip()
+        if context.startswith(("import ", "from ")):
+            continue
+            
+        if files_only:
+            return [{"file": relative_path}]
+            
+        results.append({
+            "file": relative_path,
+            "line": line_num,
+            "context": context,
+            "usage_type": "direct_reference"
+        })
+        
+    return results
+
+@functools.lru_cache(maxsize=16)
+def _needle_finder(needle_groups: Tuple[Tuple[str, ...], ...]) -> Callable[[bytes], Set[int]]:
+    """
+    Build a case-insensitive finder reporting which needle groups occur in a text
+    
+    All groups are searched in a single pass with an Aho-Corasick automaton when
+    pyahocorasick is installed, otherwise with one substring search per needle.
+    
+    Args:
+        needle_groups: Literals per dependency; a group is present if any of its needles is
+        
+    Returns:
+        Callable[[bytes], Set[int]]: Function returning the indexes of the groups present
+    """
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for index, needles in enumerate(needle_groups):
+            for needle in needles:
+                needle = needle.lower()
+                automaton.add_word(needle, automaton.get(needle, ()) + (index,))
+        automaton.make_automaton()
+        # latin-1 maps every byte to one character, so offsets and ASCII case folding are kept
+        return lambda content: {
+            index for _, indexes in automaton.iter(content.decode('latin-1').lower()) for index in indexes
+        }
+        
+    encoded_groups = [tuple(needle.lower().encode('utf-8') for needle in needles) for needles in needle_groups]
+    
+    def find(content: bytes) -> Set[int]:
+        content = content.lower()
+        return {
+            index for index, needles in enumerate(encoded_groups)
+            if any(content.find(needle) != -1 for needle in needles)
+        }
+        
+    return find
+
+def _scan_file_for_deps(file_path: str,
+                        relative_path: str,
+                        worker: Callable,
+                        dependency_args: Tuple[Tuple, ...],
+                        needle_groups: Tuple[Tuple[str, ...], ...]) -> List[Tuple[int, List[Dict], List[str]]]:
+    """
+    Scan a file for several dependencies, reading it once
+    
+    The same bytes are used to see which dependencies can match, by the
+    content scanner for each of them, and for the lines kept for snippets.
+    
+    Args:
+        file_path: Absolute path of the file
+        relative_path: Path of the file relative to the repository
+        worker: Single-dependency content scanner taking (content, relative_path, *args)
+        dependency_args: Worker arguments per dependency
+        needle_groups: Literals per dependency that every match contains
+        
+    Returns:
+        List[Tuple[int, List[Dict], List[str]]]: Dependency index, matches and the file's
+            lines, for dependencies with matches
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            content = f.read()
+    except OSError:
+        return []
+        
+    results = []
+    lines = None
+    
+    # Only dependencies whose name occurs in the file are handed to the worker
+    for index in sorted(_needle_finder(needle_groups)(content)):
+        matches = worker(content, relative_path, *dependency_args[index])
+        if matches:
+            if lines is None:
+                lines = _split_lines(content)
+            results.append((index, matches, lines))
+            
+    return results
+
+def _split_lines(data: bytes) -> List[str]:
+    """
+    Decode file contents into lines for usage snippets
+    
+    Lines are split on "\n" only, the way the scanners count them, and CRLF
+    endings are dropped.
+    
+    Args:
+        data: Contents of the file
+        
+    Returns:
+        List[str]: Lines of the file
+    """
+    return data.replace(b'\r\n', b'\n').decode('utf-8', errors='ignore').split('\n')
+
+def _read_lines(file_path: str) -> List[str]:
+    """
+    Read a file's lines for usage snippets
+    
+    The file is read as bytes and decoded once, see _split_lines.
+    
+    Args:
+        file_path: Path of the file
+        
+    Returns:
+        List[str]: Lines of the file
+    """
+    with open(file_path, 'rb') as f:
+        return _split_lines(f.read())
+
+def _scan_keeping_lines(file_path: str,
+                        relative_path: str,
+                        worker: Callable,
+                        args: Tuple) -> List[Tuple[List[Dict], Optional[List[str]]]]:
+    """
+    Run a per-file scanner and, if it matched, also return the file's lines
+    
+    The file was just scanned, so the second read is served from the page cache.
+    
+    Args:
+        file_path: Absolute path of the file
+        relative_path: Path of the file relative to the repository
+        worker: Single-file scanner taking (file_path, relative_path, *args)
+        args: Extra arguments for the worker
+        
+    Returns:
+        List[Tuple[List[Dict], Optional[List[str]]]]: The matches and the file's lines,
+            or an empty list if nothing matched
+    """
+    matches = worker(file_path, relative_path, *args)
+    if not matches:
+        return []
+        
+    try:
+        # Same reader extract_api_usage_examples uses when reading the file itself
+        lines = _read_lines(file_path)
+    except OSError:
+        lines = None
+        
+    return [(matches, lines)]
+
+def _map_files(worker: Callable,
+               files: List[Tuple[str, str]],
+               args: Tuple,
+               use_processes: bool) -> List[Dict]:
+    """
+    Run a per-file scanner over files, in parallel once there are enough of them
+    
+    Results keep the order of files, so output is the same as a serial scan.
+    
+    Args:
+        worker: Module-level function taking (file_path, relative_path, *args)
+        files: (absolute, relative) path pairs to scan
+        args: Extra arguments passed to every worker call
+        use_processes: If True, use worker processes (for GIL-bound work) instead of threads
+        
+    Returns:
+        List[Dict]: Concatenated worker results
+    """
+    results = []
+    
+    if len(files) < _PARALLEL_SCAN_MIN_FILES:
+        for file_path, relative_path in files:
+            results.extend(worker(file_path, relative_path, *args))
+        return results
+        
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with executor_class(max_workers=_MAX_SCAN_WORKERS) as executor:
+        file_results = executor.map(
+            worker,
+            [file_path for file_path, _ in files],
+            [relative_path for _, relative_path in files],
+            *[[arg] * len(files) for arg in args],
+            chunksize=32
+        )
+        for matches in file_results:
+            results.extend(matches)
+            
+    return results
+
+@functools.lru_cache(maxsize=4096)
+def _parse_version(version_string: str) -> version.Version:
+    """
+    Parse a version string, memoized since the same versions are compared repeatedly
+    
+    Args:
+        version_string: Version string
+        
+    Returns:
+        version.Version: The parsed version
+    """
+    return version.parse(version_string)
+
+@functools.lru_cache(maxsize=64)
+def _sorted_versions(versions: Tuple[str, ...]) -> Tuple[List, Tuple[str, ...]]:
+    """
+    Parse and sort release versions so ranges can be found by bisection
+    
+    Args:
+        versions: Version strings
+        
+    Returns:
+        Tuple[List, Tuple[str, ...]]: Parsed versions in ascending order, and the
+            original strings in the same order
+    """
+    pairs = sorted((_parse_version(v), v) for v in versions)
+    return [parsed for parsed, _ in pairs], tuple(v for _, v in pairs)
+
+def _escape_posix_regex(text: str) -> str:
+    """
+    Escape text for use as a literal in a POSIX regular expression (as used by git -G)
+    
+    Args:
+        text: Literal text
+        
+    Returns:
+        str: The escaped pattern
+    """
+    return _POSIX_REGEX_SPECIAL_RE.sub(r"\\\1", text)
+
+def _iter_source_files(root: str,
+                       extensions: Tuple[str, ...],
+                       skip_dirs: frozenset) -> Iterator[Tuple[str, str]]:
+    """
+    Yield source files under a directory, pruning skipped directories by name
+    
+    Files are yielded in the same order as a top-down os.walk, but skipped
+    directories are never entered and entries are classified from the
+    DirEntry without extra stat calls.
+    
+    Args:
+        root: Directory to search
+        extensions: File extensions to include
+        skip_dirs: Directory names not to descend into
+        
+    Returns:
+        Iterator[Tuple[str, str]]: Absolute and root-relative paths of matching files
+    """
+    stack = [root]
+    while stack:
+        subdirs = []
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in skip_dirs:
+                            subdirs.append(entry.path)
+                    elif entry.name.endswith(extensions):
+                        yield entry.path, os.path.relpath(entry.path, root)
+        except OSError:
+            continue
+        stack.extend(reversed(subdirs))
 
 class CodeImpactAnalyzer:
-    def __init__(self, repo_path: str):
+    def __init__(self, repo_path: str, extra_deny: Optional[Set[str]] = None):
         """
         Initialize the code impact analyzer
         
         Args:
             repo_path: Path to the repository
+            extra_deny: Additional Java package prefixes (e.g. "org.slf4j") whose imports are ignored
         """
         self.repo_path = repo_path
+        self.import_denylist = JDK_IMPORT_DENYLIST | set(extra_deny or ())
+        self.rg_path = shutil.which("rg")
+        # Upgrade history per dependency; history does not change during a run
+        self._history_cache: Dict[str, List[Dict]] = {}
+        # Usage locations per dependency, shared by the example and breaking-change passes
+        self._usage_cache: Dict[str, List[Dict]] = {}
+        # Lines of files with usages, kept by the scan so snippets need no second read
+        self._content_cache: Dict[str, List[str]] = {}
         
     def find_dependency_usage(self, dependency_name: str) -> List[Dict]:
         """
@@ -27,96 +766,275 @@ class CodeImpactAnalyzer:
         Returns:
             List[Dict]: List of files and lines where the dependency is used
         """
-        project_type = self._detect_project_type()
+        if dependency_name not in self._usage_cache:
+            self._usage_cache[dependency_name] = self._scan_files_for_dep(dependency_name)
+        return self._usage_cache[dependency_name]
+        
+    def _scan_files_for_dep(self, dependency_name: str, files_only: bool = False) -> List[Dict]:
+        """
+        Run the finder for the project type
+        
+        Args:
+            dependency_name: Name of the dependency
+            files_only: If True, return one {"file": ...} entry per affected file,
+                skipping line and context extraction after each file's first hit
+                
+        Returns:
+            List[Dict]: Usage locations, or affected files when files_only is set
+        """
+        project_type = self.project_type
         
         if project_type == "npm":
-            return self._find_js_dependency_usage(dependency_name)
+            return self._find_js_dependency_usage(dependency_name, files_only)
         elif project_type == "pip":
-            return self._find_python_dependency_usage(dependency_name)
+            return self._find_python_dependency_usage(dependency_name, files_only)
         elif project_type in ["maven", "gradle"]:
-            return self._find_java_dependency_usage(dependency_name)
+            return self._find_java_dependency_usage(dependency_name, files_only)
         else:
             return []
     
-    def _detect_project_type(self) -> str:
+    def find_all_dependency_usage(self, dependency_names: List[str]) -> Dict[str, List[Dict]]:
         """
-        Detect the type of project based on configuration files
+        Find where each of several dependencies is used, walking the codebase once
+        
+        Every source file is listed once (see _list_source_files) and read once.
+        That can differ from find_dependency_usage, which selects files with
+        ripgrep when it is installed, and which takes Java imports from ripgrep's
+        output. ripgrep also skips hidden files, which git ls-files lists when
+        they are tracked. Results are cached the same way, including the lines
+        kept for snippets.
+        
+        Args:
+            dependency_names: Names of the dependencies
+            
+        Returns:
+            Dict[str, List[Dict]]: Usage locations keyed by dependency name
+        """
+        pending = [name for name in dict.fromkeys(dependency_names) if name not in self._usage_cache]
+        project_type = self.project_type
+        
+        if pending and project_type in ["npm", "pip", "maven", "gradle"]:
+            if project_type == "npm":
+                worker, extensions, skip_dirs, use_processes = _scan_js_content, _JS_EXTENSIONS, _JS_SKIP_DIRS, False
+                dependency_args = [(name,) for name in pending]
+                needle_groups = [(name,) for name in pending]
+            elif project_type == "pip":
+                worker, extensions, skip_dirs, use_processes = _scan_python_content, _PYTHON_EXTENSIONS, _PYTHON_SKIP_DIRS, True
+                dependency_args = [(name.lower().replace('-', '_'),) for name in pending]
+                needle_groups = dependency_args
+            else:
+                worker, extensions, skip_dirs, use_processes = _scan_java_content, _JAVA_EXTENSIONS, _JAVA_SKIP_DIRS, True
+                dependency_args = [self._java_scan_args(name) for name in pending]
+                needle_groups = [candidates for candidates, _ in dependency_args]
+                
+            source_files = self._list_source_files(extensions, skip_dirs)
+            if project_type == "npm":
+                source_files = [
+                    (file_path, relative_path) for file_path, relative_path in source_files
+                    if not _is_generated_js(file_path)
+                ]
+            file_results = _map_files(
+                _scan_file_for_deps,
+                source_files,
+                (worker, tuple(dependency_args), tuple(needle_groups)),
+                use_processes
+            )
+            
+            buckets = {name: [] for name in pending}
+            for index, matches, lines in file_results:
+                buckets[pending[index]].extend(matches)
+                self._content_cache[matches[0]["file"]] = lines
+            self._usage_cache.update(buckets)
+        else:
+            for name in pending:
+                self._usage_cache[name] = []
+                
+        return {name: self._usage_cache[name] for name in dependency_names}
+        
+    @functools.cached_property
+    def project_type(self) -> str:
+        """
+        Type of project, detected from its configuration files
+        
+        The repository root is listed once and the result kept, since the
+        configuration files don't change during a run.
         
         Returns:
             str: Project type (npm, maven, pip, etc.)
         """
-        if os.path.exists(os.path.join(self.repo_path, "package.json")):
+        try:
+            with os.scandir(self.repo_path) as entries:
+                names = {entry.name for entry in entries}
+        except OSError:
+            return "unknown"
+            
+        if "package.json" in names:
             return "npm"
-        elif os.path.exists(os.path.join(self.repo_path, "pom.xml")):
+        elif "pom.xml" in names:
             return "maven"
-        elif os.path.exists(os.path.join(self.repo_path, "requirements.txt")) or \
-             os.path.exists(os.path.join(self.repo_path, "setup.py")):
+        elif "requirements.txt" in names or "setup.py" in names:
             return "pip"
-        elif os.path.exists(os.path.join(self.repo_path, "build.gradle")) or \
-             os.path.exists(os.path.join(self.repo_path, "build.gradle.kts")):
+        elif "build.gradle" in names or "build.gradle.kts" in names:
             return "gradle"
         else:
             return "unknown"
+            
+    def _detect_project_type(self) -> str:
+        """
+        Detect the type of project based on configuration files
+        
+        Returns:
+            str: Project type (npm, maven, pip, etc.)
+        """
+        return self.project_type
     
-    def _find_js_dependency_usage(self, dependency_name: str) -> List[Dict]:
+    def _find_js_dependency_usage(self, dependency_name: str, files_only: bool = False) -> List[Dict]:
         """
         Find where a JavaScript/npm dependency is used in the codebase
         
         Args:
             dependency_name: Name of the npm package
+            files_only: If True, return only the affected files
             
         Returns:
             List[Dict]: List of files and lines where the dependency is used
         """
-        usage_patterns = [
-            f"require\\(['\"]({dependency_name}|{dependency_name}/[^'\"]+)['\"]\\)",
-            f"from ['\"]({dependency_name}|{dependency_name}/[^'\"]+)['\"]",
-            f"import .+ from ['\"]({dependency_name}|{dependency_name}/[^'\"]+)['\"]"
+        js_files = [
+            (file_path, relative_path)
+            for file_path, relative_path in self._collect_files(dependency_name, _JS_EXTENSIONS, _JS_SKIP_DIRS)
+            if not _is_generated_js(file_path)
         ]
         
-        results = []
+        # After the substring prefilter most of the per-file cost is reading, so threads suffice
+        return self._map_scan(_scan_js_file, js_files, (dependency_name, files_only), files_only, use_processes=False)
+    
+    def _collect_files(self,
+                       needle: str,
+                       extensions: Tuple[str, ...],
+                       skip_dirs: frozenset) -> List[Tuple[str, str]]:
+        """
+        Collect the source files a scan has to look at
         
-        for root, _, files in os.walk(self.repo_path):
-            # Skip node_modules and other non-source directories
-            if "node_modules" in root or ".git" in root:
-                continue
+        With ripgrep available, only files containing the needle are returned, so
+        traversal and the substring prefilter run natively. Otherwise every source
+        file is returned and the scanners prefilter them.
+        
+        Args:
+            needle: Literal every match contains
+            extensions: File extensions to include
+            skip_dirs: Directory names not to descend into
+            
+        Returns:
+            List[Tuple[str, str]]: Absolute and repository-relative paths of the files
+        """
+        if self.rg_path:
+            files = self._find_files_with_rg(needle, extensions, skip_dirs)
+            if files is not None:
+                return files
                 
-            for file in files:
-                if file.endswith((".js", ".jsx", ".ts", ".tsx")):
-                    file_path = os.path.join(root, file)
-                    relative_path = os.path.relpath(file_path, self.repo_path)
-                    
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        try:
-                            content = f.read()
-                            
-                            for pattern in usage_patterns:
-                                for match in re.finditer(pattern, content):
-                                    # Get line number
-                                    line_num = content[:match.start()].count('\n') + 1
-                                    
-                                    # Extract context (the line of code)
-                                    lines = content.split('\n')
-                                    context = lines[line_num - 1] if line_num <= len(lines) else ""
-                                    
-                                    results.append({
-                                        "file": relative_path,
-                                        "line": line_num,
-                                        "context": context.strip(),
-                                        "import_path": match.group(1)
-                                    })
-                        except:
-                            # Skip files that can't be read
-                            pass
+        return self._list_source_files(extensions, skip_dirs)
         
-        return results
+    def _list_source_files(self,
+                           extensions: Tuple[str, ...],
+                           skip_dirs: frozenset) -> List[Tuple[str, str]]:
+        """
+        List every source file with one of the extensions
+        
+        In a git checkout the list comes from the index via git ls-files, which also
+        leaves out ignored files; otherwise the tree is walked.
+        
+        Args:
+            extensions: File extensions to include
+            skip_dirs: Directory names not to descend into
+            
+        Returns:
+            List[Tuple[str, str]]: Absolute and repository-relative paths of the files
+        """
+        files = self._git_ls_files(extensions, skip_dirs)
+        if files is not None:
+            return files
+            
+        return list(_iter_source_files(self.repo_path, extensions, skip_dirs))
+        
+    def _git_ls_files(self,
+                      extensions: Tuple[str, ...],
+                      skip_dirs: frozenset) -> Optional[List[Tuple[str, str]]]:
+        """
+        List tracked and untracked, non-ignored source files using git
+        
+        Args:
+            extensions: File extensions to include
+            skip_dirs: Directory names not to descend into
+            
+        Returns:
+            Optional[List[Tuple[str, str]]]: Absolute and repository-relative paths, sorted,
+                or None if the repository is not a git checkout
+        """
+        command = ["git", "-C", self.repo_path, "ls-files", "-z", "--cached", "--others", "--exclude-standard", "--"]
+        command.extend(f"*{extension}" for extension in extensions)
+        
+        try:
+            result = subprocess.run(command, capture_output=True)
+        except OSError:
+            return None
+            
+        if result.returncode != 0:
+            return None
+            
+        files = []
+        # Unmerged files are listed once per conflict stage
+        for relative_path in dict.fromkeys(os.fsdecode(result.stdout).split("\0")):
+            # Committed build output or vendored trees are skipped just like in a walk
+            if not relative_path or not skip_dirs.isdisjoint(relative_path.split("/")[:-1]):
+                continue
+            files.append((os.path.join(self.repo_path, relative_path), os.path.normpath(relative_path)))
+            
+        return files
+        
+    def _find_files_with_rg(self,
+                            needle: str,
+                            extensions: Tuple[str, ...],
+                            skip_dirs: frozenset) -> Optional[List[Tuple[str, str]]]:
+        """
+        List source files containing a literal using ripgrep
+        
+        Args:
+            needle: Literal to search for
+            extensions: File extensions to include
+            skip_dirs: Directory names not to descend into
+            
+        Returns:
+            Optional[List[Tuple[str, str]]]: Absolute and repository-relative paths, sorted,
+                or None if ripgrep failed and the tree should be walked instead
+        """
+        command = [self.rg_path, "--files-with-matches", "--null", "--fixed-strings", "-e", needle]
+        for extension in extensions:
+            command.extend(["-g", f"*{extension}"])
+        for skip_dir in sorted(skip_dirs):
+            command.extend(["-g", f"!{skip_dir}/"])
+        command.append(self.repo_path)
+        
+        try:
+            result = subprocess.run(command, capture_output=True)
+        except OSError as e:
+            print(f"Error running ripgrep: {e}")
+            return None
+            
+        # Exit status 1 only means there were no matches
+        if result.returncode > 1:
+            return None
+            
+        # ripgrep searches in parallel, so sort to keep results deterministic
+        paths = sorted(path for path in os.fsdecode(result.stdout).split("\0") if path)
+        return [(path, os.path.relpath(path, self.repo_path)) for path in paths]
     
-    def _find_python_dependency_usage(self, dependency_name: str) -> List[Dict]:
+    def _find_python_dependency_usage(self, dependency_name: str, files_only: bool = False) -> List[Dict]:
         """
         Find where a Python dependency is used in the codebase
         
         Args:
             dependency_name: Name of the Python package
+            files_only: If True, return only the affected files
             
         Returns:
             List[Dict]: List of files and lines where the dependency is used
@@ -124,85 +1042,85 @@ class CodeImpactAnalyzer:
         # Normalize dependency name
         normalized_name = dependency_name.lower().replace('-', '_')
         
-        usage_patterns = [
-            f"import {normalized_name}",
-            f"from {normalized_name} import",
-            f"import {normalized_name} as"
-        ]
+        python_files = self._collect_files(normalized_name, _PYTHON_EXTENSIONS, _PYTHON_SKIP_DIRS)
         
-        results = []
+        # Regex matching holds the GIL, so it is spread over processes
+        return self._map_scan(_scan_python_file, python_files, (normalized_name, files_only), files_only, use_processes=True)
+    
+    def _find_java_dependency_usage(self, dependency_name: str, files_only: bool = False) -> List[Dict]:
+        """
+        Find where a Java dependency is used in the codebase
         
-        for root, _, files in os.walk(self.repo_path):
-            # Skip virtual environments and other non-source directories
-            if "venv" in root or ".git" in root or "__pycache__" in root:
-                continue
+        Args:
+            dependency_name: Name of the Maven/Gradle package (groupId:artifactId)
+            files_only: If True, return only the affected files
+            
+        Returns:
+            List[Dict]: List of files and lines where the dependency is used
+        """
+        package_name_candidates, deny_prefixes = self._java_scan_args(dependency_name)
+        
+        if self.rg_path:
+            results = self._find_java_usage_with_rg(package_name_candidates, deny_prefixes)
+            if results is not None:
+                if files_only:
+                    return [{"file": file} for file in dict.fromkeys(result["file"] for result in results)]
+                return results
                 
-            for file in files:
-                if file.endswith(".py"):
-                    file_path = os.path.join(root, file)
-                    relative_path = os.path.relpath(file_path, self.repo_path)
-                    
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        try:
-                            content = f.read()
-                            
-                            for pattern in usage_patterns:
-                                for match in re.finditer(pattern, content):
-                                    # Get line number
-                                    line_num = content[:match.start()].count('\n') + 1
-                                    
-                                    # Extract context (the line of code)
-                                    lines = content.split('\n')
-                                    context = lines[line_num - 1] if line_num <= len(lines) else ""
-                                    
-                                    results.append({
-                                        "file": relative_path,
-                                        "line": line_num,
-                                        "context": context.strip(),
-                                        "import_path": pattern.replace(normalized_name, normalized_name)
-                                    })
-                                    
-                            # Also try to find usage of the package's functions/classes
-                            try:
-                                tree = ast.parse(content)
-                                for node in ast.walk(tree):
-                                    if isinstance(node, ast.Name) and node.id == normalized_name:
-                                        line_num = node.lineno
-                                        
-                                        # Extract context
-                                        lines = content.split('\n')
-                                        context = lines[line_num - 1] if line_num <= len(lines) else ""
-                                        
-                                        results.append({
-                                            "file": relative_path,
-                                            "line": line_num,
-                                            "context": context.strip(),
-                                            "usage_type": "direct_reference"
-                                        })
-                            except:
-                                # Skip AST parsing errors
-                                pass
-                        except:
-                            # Skip files that can't be read
-                            pass
+        java_files = self._list_source_files(_JAVA_EXTENSIONS, _JAVA_SKIP_DIRS)
+        
+        # Each file is independent, so spread the CPU-bound matching over all cores
+        return self._map_scan(
+            _scan_java_file,
+            java_files,
+            (package_name_candidates, deny_prefixes, files_only),
+            files_only,
+            use_processes=True
+        )
         
+    def _map_scan(self,
+                  worker: Callable,
+                  files: List[Tuple[str, str]],
+                  args: Tuple,
+                  files_only: bool,
+                  use_processes: bool) -> List[Dict]:
+        """
+        Run a per-file scanner, keeping the lines of files with matches for later snippets
+        
+        Args:
+            worker: Module-level scanner taking (file_path, relative_path, *args)
+            files: (absolute, relative) path pairs to scan
+            args: Extra arguments passed to every worker call
+            files_only: If True, only affected files are wanted, so no lines are kept
+            use_processes: If True, use worker processes instead of threads
+            
+        Returns:
+            List[Dict]: Concatenated worker results
+        """
+        if files_only:
+            return _map_files(worker, files, args, use_processes)
+            
+        results = []
+        for matches, lines in _map_files(_scan_keeping_lines, files, (worker, args), use_processes):
+            results.extend(matches)
+            if lines is not None:
+                self._content_cache[matches[0]["file"]] = lines
+                
         return results
     
-    def _find_java_dependency_usage(self, dependency_name: str) -> List[Dict]:
+    def _java_scan_args(self, dependency_name: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
         """
-        Find where a Java dependency is used in the codebase
+        Derive the package name candidates and denied import prefixes for a Java dependency
         
         Args:
             dependency_name: Name of the Maven/Gradle package (groupId:artifactId)
             
         Returns:
-            List[Dict]: List of files and lines where the dependency is used
+            Tuple[Tuple[str, ...], Tuple[str, ...]]: Package name candidates and deny prefixes
         """
-        # Extract artifactId from the dependency name
-        try:
-            group_id, artifact_id = dependency_name.split(":")
-        except:
-            artifact_id = dependency_name
+        # Extract artifactId from the dependency name (groupId:artifactId[:version])
+        _, separator, coordinates = dependency_name.partition(":")
+        artifact_id = coordinates.partition(":")[0] if separator else dependency_name
             
         # Convert artifact_id to potential package names
         # This is a heuristic and might not work for all cases
@@ -223,49 +1141,79 @@ class CodeImpactAnalyzer:
             package_name_candidates.append(pascal_case)
         else:
             package_name_candidates.append(artifact_id)
+            
+        package_name_candidates = tuple(dict.fromkeys(package_name_candidates))
+        
+        # Never deny the package tree the dependency itself is published under
+        group_id = dependency_name.partition(":")[0] if separator else ""
+        deny_prefixes = tuple(
+            f"{prefix}." for prefix in sorted(self.import_denylist)
+            if not f"{group_id}.".startswith(f"{prefix}.")
+        )
+        return package_name_candidates, deny_prefixes
+        
+    def _find_java_usage_with_rg(self,
+                                 package_name_candidates: Tuple[str, ...],
+                                 deny_prefixes: Tuple[str, ...] = ()) -> Optional[List[Dict]]:
+        """
+        Find Java import statements referencing the dependency using ripgrep
+        
+        Args:
+            package_name_candidates: Package name fragments identifying the dependency
+            deny_prefixes: Package prefixes whose imports are ignored
+            
+        Returns:
+            Optional[List[Dict]]: List of files and lines where the dependency is used,
+                or None if ripgrep failed and the Python scanner should be used instead
+        """
+        command = [self.rg_path, "--json", "--line-number", "--ignore-case", "--fixed-strings"]
+        for candidate in package_name_candidates:
+            command.extend(["-e", candidate])
+        for extension in ("java", "kt", "scala"):
+            command.extend(["-g", f"*.{extension}"])
+        for skip_dir in sorted(_JAVA_SKIP_DIRS):
+            command.extend(["-g", f"!{skip_dir}/"])
+        command.append(self.repo_path)
         
+        matches_candidate = _candidate_matcher(package_name_candidates)
         results = []
         
-        for root, _, files in os.walk(self.repo_path):
-            # Skip build directories and other non-source directories
-            if "build" in root or "target" in root or ".git" in root:
-                continue
-                
-            for file in files:
-                if file.endswith((".java", ".kt", ".scala")):
-                    file_path = os.path.join(root, file)
-                    relative_path = os.path.relpath(file_path, self.repo_path)
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            print(f"Error running ripgrep: {e}")
+            return None
+            
+        # ripgrep streams one JSON event per line; only "match" events carry hits
+        with process.stdout:
+            for raw_event in process.stdout:
+                event = _json_loads(raw_event)
+                if event["type"] != "match":
+                    continue
                     
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        try:
-                            content = f.read()
-                            
-                            # Look for import statements
-                            import_pattern = r"import\s+([^;]+);"
-                            for match in re.finditer(import_pattern, content):
-                                import_stmt = match.group(1).strip()
-                                
-                                # Check if any candidate is in the import statement
-                                for candidate in package_name_candidates:
-                                    if candidate.lower() in import_stmt.lower():
-                                        # Get line number
-                                        line_num = content[:match.start()].count('\n') + 1
-                                        
-                                        # Extract context (the line of code)
-                                        lines = content.split('\n')
-                                        context = lines[line_num - 1] if line_num <= len(lines) else ""
-                                        
-                                        results.append({
-                                            "file": relative_path,
-                                            "line": line_num,
-                                            "context": context.strip(),
-                                            "import_path": import_stmt
-                                        })
-                                        break
-                        except:
-                            # Skip files that can't be read
-                            pass
-        
+                data = event["data"]
+                path = data["path"].get("text")
+                line = data["lines"].get("text")
+                if path is None or line is None:
+                    # Non UTF-8 paths or lines are reported as base64 bytes
+                    continue
+                    
+                for match in _JAVA_IMPORT_TEXT_RE.finditer(line):
+                    import_stmt = match.group(1).strip()
+                    if matches_candidate(import_stmt) and not _is_denied_import(import_stmt, deny_prefixes):
+                        results.append({
+                            "file": os.path.relpath(path, self.repo_path),
+                            "line": data["line_number"],
+                            "context": line.strip(),
+                            "import_path": import_stmt
+                        })
+                        
+        # Exit status 1 only means there were no matches
+        if process.wait() > 1:
+            return None
+            
+        # ripgrep searches in parallel, so sort to keep results deterministic
+        results.sort(key=lambda result: (result["file"], result["line"]))
         return results
     
     def extract_api_usage_examples(self, dependency_name: str, max_examples: int = 10) -> List[str]:
@@ -297,22 +1245,23 @@ class CodeImpactAnalyzer:
             processed_files.add(file_path)
             
             try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    
-                    # Extract a code snippet around the usage
-                    lines = content.split('\n')
-                    line_index = usage["line"] - 1
-                    
-                    # Get a window of lines around the usage
-                    start = max(0, line_index - 5)
-                    end = min(len(lines), line_index + 15)
-                    
-                    snippet = "\n".join(lines[start:end])
-                    examples.append(f"File: {usage['file']}\n```\n{snippet}\n```")
-                    
-                    if len(examples) >= max_examples:
-                        break
+                # The scan keeps the lines of files it matched; only read files it did not
+                lines = self._content_cache.get(usage["file"])
+                if lines is None:
+                    lines = _read_lines(file_path)
+                        
+                # Extract a code snippet around the usage
+                line_index = usage["line"] - 1
+                
+                # Get a window of lines around the usage
+                start = max(0, line_index - 5)
+                end = min(len(lines), line_index + 15)
+                
+                snippet = "\n".join(lines[start:end])
+                examples.append(f"File: {usage['file']}\n```\n{snippet}\n```")
+                
+                if len(examples) >= max_examples:
+                    break
             except:
                 continue
         
@@ -336,7 +1285,7 @@ class CodeImpactAnalyzer:
         # This would ideally query package documentation, release notes, etc.
         # For this example, we'll use a simplified approach
         
-        project_type = self._detect_project_type()
+        project_type = self.project_type
         
         # Get usage examples
         usage_examples = self.extract_api_usage_examples(dependency_name)
@@ -347,37 +1296,31 @@ class CodeImpactAnalyzer:
         # For npm packages, we can use the npm view command to get information
         if project_type == "npm":
             try:
-                result = subprocess.run(
-                    ["npm", "view", dependency_name, "versions", "--json"],
-                    capture_output=True,
-                    text=True
-                )
+                versions = self._get_npm_versions(dependency_name, target_version)
                 
-                if result.returncode == 0:
-                    versions = json.loads(result.stdout)
+                # Find versions between current and target
+                try:
+                    current_ver = _parse_version(current_version)
+                    target_ver = _parse_version(target_version)
                     
-                    # Find versions between current and target
-                    try:
-                        from packaging import version
-                        current_ver = version.parse(current_version)
-                        target_ver = version.parse(target_version)
-                        
-                        intermediate_versions = [
-                            v for v in versions
-                            if current_ver < version.parse(v) <= target_ver
-                        ]
-                    except:
-                        intermediate_versions = []
-                        
-                    return {
-                        "dependency": dependency_name,
-                        "current_version": current_version,
-                        "target_version": target_version,
-                        "usage_examples": usage_examples,
-                        "previous_upgrades": repo_history,
-                        "intermediate_versions": intermediate_versions,
-                        "risk_assessment": self._assess_upgrade_risk(dependency_name, current_version, target_version)
-                    }
+                    parsed_versions, sorted_versions = _sorted_versions(tuple(versions))
+                    lo = bisect.bisect_right(parsed_versions, current_ver)
+                    hi = bisect.bisect_right(parsed_versions, target_ver)
+                    intermediate_versions = list(sorted_versions[lo:hi])
+                except:
+                    intermediate_versions = []
+                    
+                return {
+                    "dependency": dependency_name,
+                    "current_version": current_version,
+                    "target_version": target_version,
+                    "usage_examples": usage_examples,
+                    "previous_upgrades": repo_history,
+                    "intermediate_versions": intermediate_versions,
+                    "risk_assessment": self._assess_upgrade_risk(dependency_name, current_version, target_version)
+                }
+            except subprocess.CalledProcessError as e:
+                print(f"Error analyzing npm breaking changes: {e.stderr.decode('utf-8', 'replace')}")
             except Exception as e:
                 print(f"Error analyzing npm breaking changes: {e}")
         
@@ -391,6 +1334,49 @@ class CodeImpactAnalyzer:
             "risk_assessment": self._assess_upgrade_risk(dependency_name, current_version, target_version)
         }
     
+    def _get_npm_versions(self, dependency_name: str, target_version: str) -> List[str]:
+        """
+        Get the published versions of an npm package, using the on-disk cache when possible
+        
+        Args:
+            dependency_name: Name of the npm package
+            target_version: Target version for upgrade; a cached list without it is refreshed
+            
+        Returns:
+            List[str]: Published versions of the package
+        """
+        cache_path = os.path.join(NPM_VERSIONS_CACHE_DIR, dependency_name, "versions.json")
+        
+        try:
+            with open(cache_path, 'rb') as f:
+                versions = _json_loads(f.read())
+            if target_version in versions:
+                return versions
+        except (OSError, ValueError):
+            pass
+            
+        result = subprocess.run(
+            ["npm", "view", dependency_name, "versions", "--json"],
+            capture_output=True,
+            check=True
+        )
+        
+        versions = _json_loads(result.stdout)
+        if isinstance(versions, str):
+            # npm prints a bare string for packages with a single release
+            versions = [versions]
+            
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(versions, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Error caching npm versions: {e}")
+            
+        return versions
+    
     def _get_dependency_upgrade_history(self, dependency_name: str) -> List[Dict]:
         """
         Get history of previous upgrades for a dependency
@@ -401,50 +1387,79 @@ class CodeImpactAnalyzer:
         Returns:
             List[Dict]: History of previous upgrades
         """
-        try:
-            repo = Repo(self.repo_path)
+        if dependency_name in self._history_cache:
+            return self._history_cache[dependency_name]
             
-            # This is a simplified approach - in a real implementation,
-            # we would search commit messages and diff content more thoroughly
+        try:
             history = []
             
-            # Look for package.json changes for npm
-            if os.path.exists(os.path.join(self.repo_path, "package.json")):
-                for commit in repo.iter_commits(paths="package.json"):
-                    if dependency_name.lower() in commit.message.lower():
-                        history.append({
-                            "commit": commit.hexsha,
-                            "date": commit.committed_datetime.isoformat(),
-                            "message": commit.message
-                        })
-            
-            # Look for requirements.txt changes for Python
-            elif os.path.exists(os.path.join(self.repo_path, "requirements.txt")):
-                for commit in repo.iter_commits(paths="requirements.txt"):
-                    if dependency_name.lower() in commit.message.lower():
-                        history.append({
-                            "commit": commit.hexsha,
-                            "date": commit.committed_datetime.isoformat(),
-                            "message": commit.message
-                        })
-            
-            # Look for pom.xml changes for Maven
-            elif os.path.exists(os.path.join(self.repo_path, "pom.xml")):
-                for commit in repo.iter_commits(paths="pom.xml"):
-                    if dependency_name.lower() in commit.message.lower():
-                        history.append({
-                            "commit": commit.hexsha,
-                            "date": commit.committed_datetime.isoformat(),
-                            "message": commit.message
-                        })
-            
-            return history[:5]  # Return the 5 most recent upgrades
+            # Look for changes to the manifest of the project type: package.json for npm,
+            # requirements.txt for Python, pom.xml for Maven
+            for manifest in ("package.json", "requirements.txt", "pom.xml"):
+                if os.path.exists(os.path.join(self.repo_path, manifest)):
+                    # A pom.xml diff never spells out "group:artifact", so look for the artifactId
+                    diff_term = dependency_name.rsplit(":", 1)[-1] if manifest == "pom.xml" else dependency_name
+                    
+                    # git can't OR --grep with -G, so commits naming the dependency in their
+                    # message and commits whose manifest diff mentions it are listed separately
+                    commits = {}
+                    for selector in (["-F", f"--grep={dependency_name}"], [f"-G{_escape_posix_regex(diff_term)}"]):
+                        for timestamp, commit in self._git_log_commits(selector, manifest):
+                            commits.setdefault(commit["commit"], (timestamp, commit))
+                            
+                    # The 5 most recent upgrades
+                    history = [commit for _, commit in sorted(commits.values(), key=lambda entry: entry[0], reverse=True)[:5]]
+                    break
+                    
+            self._history_cache[dependency_name] = history
+            return history
             
+        except subprocess.CalledProcessError as e:
+            print(f"Error getting dependency upgrade history: {e.stderr.strip()}")
+            return []
         except Exception as e:
             print(f"Error getting dependency upgrade history: {e}")
             return []
     
-    def _assess_upgrade_risk(self, dependency_name: str, current_version: str, target_version: str) -> str:
+    def _git_log_commits(self, selector: List[str], manifest: str) -> List[Tuple[int, Dict]]:
+        """
+        List the 5 most recent commits to a manifest matching a git log selector
+        
+        Args:
+            selector: git log options choosing the commits (matched case-insensitively)
+            manifest: Manifest path relative to the repository
+            
+        Returns:
+            List[Tuple[int, Dict]]: Commit timestamp and the hash, date and message of each match
+        """
+        result = subprocess.run(
+            [
+                "git", "-C", self.repo_path, "log",
+                "-n", "5", "-i", *selector,
+                "--format=%H%x1f%ct%x1f%cI%x1f%B%x1e",
+                "--", manifest
+            ],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        
+        commits = []
+        for record in result.stdout.split("\x1e"):
+            record = record.lstrip("\n")
+            if not record:
+                continue
+            hexsha, timestamp, date, message = record.split("\x1f", 3)
+            commits.append((int(timestamp), {
+                "commit": hexsha,
+                "date": date,
+                "message": message
+            }))
+        return commits
+        
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _assess_upgrade_risk(dependency_name: str, current_version: str, target_version: str) -> str:
         """
         Assess the risk level of a dependency upgrade
         
@@ -457,10 +1472,8 @@ class CodeImpactAnalyzer:
             str: Risk level (low, medium, high)
         """
         try:
-            from packaging import version
-            
-            current_ver = version.parse(current_version)
-            target_ver = version.parse(target_version)
+            current_ver = _parse_version(current_version)
+            target_ver = _parse_version(target_version)
             
             # Major version bump is high risk
             if target_ver.major > current_ver.major:
@@ -490,5 +1503,9 @@ class CodeImpactAnalyzer:
         Returns:
             List[str]: List of potentially affected files
         """
-        usage_locations = self.find_dependency_usage(dependency_name)
-        return list(set(usage["file"] for usage in usage_locations))
+        # Reuse a full scan if one already ran for this dependency
+        if dependency_name in self._usage_cache:
+            return list(dict.fromkeys(usage["file"] for usage in self._usage_cache[dependency_name]))
+            
+        # Each affected file is reported once, so no dedup pass is needed
+        return [usage["file"] for usage in self._scan_files_for_dep(dependency_name, files_only=True)]
@@ -1,45 +1,364 @@
 # dependency_scanner.py
 import os
 import json
-import requests
-from typing import Dict, List, Optional, Tuple
-import subprocess
+import functools
+import logging
+import threading
+import time
+import urllib.parse
+import xml.etree.ElementTree as ElementTree
+import atexit
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 import re
 from packaging import version
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.specifiers import SpecifierSet
+from packaging.utils import canonicalize_name
 import semver
+from tenacity import before_sleep_log, retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+try:
+    import tomllib
+except ImportError:
+    # tomllib is only in the standard library from Python 3.11; pyproject.toml is skipped before that
+    tomllib = None
+
+try:
+    import orjson
+except ImportError:
+    # orjson is an optional accelerator; fall back to the standard library
+    orjson = None
+
+# Both parsers accept bytes, so files and response bodies are parsed without decoding first
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+logger = logging.getLogger(__name__)
+
+# Registry lookups spend nearly all their time waiting on the network
+DEFAULT_MAX_WORKERS = 16
+
+# Connect and per-read timeouts, so a stalled registry can't hang a worker
+REGISTRY_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+# Transport-level retries for failed connection attempts
+REGISTRY_CONNECT_RETRIES = 3
+
+# Attempts per registry request when it is rate limited or the registry is failing
+REGISTRY_MAX_ATTEMPTS = 5
+
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_registry_backoff = wait_exponential_jitter(initial=0.5, max=30)
+
+def _is_transient_registry_error(exc: BaseException) -> bool:
+    """
+    Check whether a registry request failure is worth retrying
+    
+    Args:
+        exc: Exception raised by the request
+        
+    Returns:
+        bool: True for rate limits, server errors and network failures
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in _RETRY_STATUSES
+    return isinstance(exc, httpx.TransportError)
+
+def _registry_retry_wait(retry_state) -> float:
+    """
+    Compute the delay before the next attempt, honouring the registry's Retry-After header
+    
+    Args:
+        retry_state: tenacity state for the request being retried
+        
+    Returns:
+        float: Seconds to sleep
+    """
+    response = getattr(retry_state.outcome.exception(), "response", None)
+    if response is not None:
+        try:
+            return min(float(response.headers.get("retry-after")), 60.0)
+        except (TypeError, ValueError):
+            pass
+    return _registry_backoff(retry_state)
+
+# Retries are logged, so a dependency ending up "unknown" after them is visible
+_retry_registry = retry(
+    retry=retry_if_exception(_is_transient_registry_error),
+    wait=_registry_retry_wait,
+    stop=stop_after_attempt(REGISTRY_MAX_ATTEMPTS),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True
+)
+
+# Latest-version lookups are kept on disk and revalidated with the registry's ETag once stale
+REGISTRY_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ai-auto-upgrade", "registry")
+REGISTRY_CACHE_TTL = 3600
+
+OSV_QUERY_BATCH_URL = "https://api.osv.dev/v1/querybatch"
+OSV_VULN_URL = "https://api.osv.dev/v1/vulns/{}"
+
+# OSV accepts at most this many queries per batch request
+OSV_BATCH_SIZE = 1000
+
+# OSV ecosystem names per project type; Gradle dependencies are Maven artifacts
+OSV_ECOSYSTEMS = {"npm": "npm", "pip": "PyPI", "maven": "Maven", "gradle": "Maven"}
+
+# ${name} references in pom.xml values
+_MAVEN_PROPERTY_RE = re.compile(r'\$\{([^}]+)\}')
+
+# Very simple regex-based extraction of pom.xml and build.gradle dependencies;
+# the pom pattern is only used when the file is not well-formed XML
+_MAVEN_DEP_RE = re.compile(
+    r'<dependency>.*?<groupId>(.*?)</groupId>.*?<artifactId>(.*?)</artifactId>.*?<version>(.*?)</version>.*?</dependency>',
+    re.DOTALL
+)
+# This is a simplification and won't catch all formats
+_GRADLE_DEP_RE = re.compile(r'implementation [\'"]([^:]+):([^:]+):([^\'"]+)[\'"]')
+
+# Sort order of upgrade priorities, most urgent first
+_PRIORITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+# GitHub advisories rate severity as "moderate" where the rest of the tool says "medium"
+_OSV_SEVERITIES = {"critical": "critical", "high": "high", "moderate": "medium", "medium": "medium", "low": "low"}
+
+# CVSS v3 base metric weights; privileges required weighs more when the scope changes
+_CVSS3_WEIGHTS = {
+    "AV": {"N": 0.85, "A": 0.62, "L": 0.55, "P": 0.2},
+    "AC": {"L": 0.77, "H": 0.44},
+    "UI": {"N": 0.85, "R": 0.62},
+    "C": {"H": 0.56, "L": 0.22, "N": 0.0},
+    "I": {"H": 0.56, "L": 0.22, "N": 0.0},
+    "A": {"H": 0.56, "L": 0.22, "N": 0.0},
+}
+_CVSS3_PRIVILEGES = {"U": {"N": 0.85, "L": 0.62, "H": 0.27}, "C": {"N": 0.85, "L": 0.68, "H": 0.5}}
+
+def _cvss3_roundup(value: float) -> float:
+    """
+    Round up to one decimal the way the CVSS v3.1 specification does
+    
+    Args:
+        value: Unrounded score
+        
+    Returns:
+        float: Smallest one-decimal number not below value
+    """
+    scaled = round(value * 100000)
+    if scaled % 10000 == 0:
+        return scaled / 100000.0
+    return (scaled // 10000 + 1) / 10.0
+
+def _cvss3_base_score(vector: str) -> Optional[float]:
+    """
+    Compute the base score of a CVSS v3 vector
+    
+    Args:
+        vector: Vector string such as "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H"
+        
+    Returns:
+        Optional[float]: Base score from 0.0 to 10.0, or None if the vector is not CVSS v3
+    """
+    if not vector.startswith("CVSS:3"):
+        return None
+        
+    metrics = dict(part.split(":", 1) for part in vector.split("/")[1:] if ":" in part)
+    try:
+        scope = metrics["S"]
+        weights = {name: values[metrics[name]] for name, values in _CVSS3_WEIGHTS.items()}
+        privileges = _CVSS3_PRIVILEGES[scope][metrics["PR"]]
+    except KeyError:
+        return None
+        
+    impact_subscore = 1 - (1 - weights["C"]) * (1 - weights["I"]) * (1 - weights["A"])
+    if scope == "U":
+        impact = 6.42 * impact_subscore
+    else:
+        impact = 7.52 * (impact_subscore - 0.029) - 3.25 * (impact_subscore - 0.02) ** 15
+    exploitability = 8.22 * weights["AV"] * weights["AC"] * privileges * weights["UI"]
+    
+    if impact <= 0:
+        return 0.0
+    if scope == "U":
+        return _cvss3_roundup(min(impact + exploitability, 10))
+    return _cvss3_roundup(min(1.08 * (impact + exploitability), 10))
+
+def _cvss_severity(score: float) -> str:
+    """
+    Map a CVSS score to its qualitative severity rating
+    
+    Args:
+        score: CVSS base score
+        
+    Returns:
+        str: critical, high, medium, low, or unknown for a score of 0
+    """
+    if score >= 9.0:
+        return "critical"
+    elif score >= 7.0:
+        return "high"
+    elif score >= 4.0:
+        return "medium"
+    elif score > 0:
+        return "low"
+    else:
+        return "unknown"
+
+@functools.lru_cache(maxsize=8192)
+def _parse_pep440_version(version_string: str) -> Optional[version.Version]:
+    """
+    Parse a PyPI/Maven version string, memoized
+    
+    Args:
+        version_string: Version string
+        
+    Returns:
+        Optional[version.Version]: The parsed version, or None if it is not valid
+    """
+    try:
+        return version.parse(version_string)
+    except Exception:
+        return None
+
+@functools.lru_cache(maxsize=8192)
+def _parse_semver_version(version_string: str) -> Optional[semver.VersionInfo]:
+    """
+    Parse an npm (semver) version string, memoized
+    
+    Args:
+        version_string: Version string
+        
+    Returns:
+        Optional[semver.VersionInfo]: The parsed version, or None if it is not valid
+    """
+    try:
+        return semver.VersionInfo.parse(version_string)
+    except Exception:
+        return None
+
+def _specifier_allows_upgrade(specifier: str, current_version: str, latest_version: str) -> bool:
+    """
+    Check whether a requirement can be moved to a version by rewriting its version clause
+    
+    The updater only rewrites the ==, ===, >= or ~= clause naming the current
+    version, so every other clause (an upper bound, an exclusion) has to allow the
+    new version as it stands.
+    
+    Args:
+        specifier: Version specifier of the requirement
+        current_version: Version the requirement currently names
+        latest_version: Version to upgrade to
+        
+    Returns:
+        bool: True if no other clause rules the version out
+    """
+    return all(
+        clause.contains(latest_version, prereleases=True)
+        for clause in SpecifierSet(specifier)
+        if not (clause.operator in ("==", "===", ">=", "~=") and clause.version == current_version)
+    )
+
+def _classify_update(current_version: str,
+                     latest_version: str,
+                     parse_version: Callable[[str], Optional[object]]) -> str:
+    """
+    Classify the update from the current to the latest version
+    
+    Args:
+        current_version: Current version
+        latest_version: Latest version
+        parse_version: Memoized parser returning None for invalid versions
+        
+    Returns:
+        str: Update type (major, minor, patch, none, unknown)
+    """
+    if latest_version == current_version:
+        return "none"
+        
+    current_ver = parse_version(current_version)
+    latest_ver = parse_version(latest_version)
+    if current_ver is None or latest_ver is None:
+        return "unknown"
+        
+    if latest_ver.major > current_ver.major:
+        return "major"
+    elif latest_ver.minor > current_ver.minor:
+        return "minor"
+    else:
+        return "patch"
 
 class DependencyScanner:
-    def __init__(self, repo_path: str):
+    def __init__(self, repo_path: str, max_workers: int = DEFAULT_MAX_WORKERS):
         """
         Initialize the dependency scanner
         
         Args:
             repo_path: Path to the repository to scan
+            max_workers: Maximum number of dependencies looked up concurrently
         """
         self.repo_path = repo_path
         self.github_token = os.getenv("GITHUB_TOKEN")
         self.nvd_api_key = os.getenv("NVD_API_KEY")
+        self.max_workers = max_workers
         
-    def detect_project_type(self) -> str:
+        # One pooled HTTP/2 client keeps registry connections alive across lookups and
+        # multiplexes concurrent lookups to the same registry over one connection;
+        # response compression is negotiated by httpx based on the installed decoders
+        self.session = httpx.Client(
+            timeout=REGISTRY_TIMEOUT,
+            transport=httpx.HTTPTransport(
+                http2=True,
+                limits=httpx.Limits(max_connections=max(50, max_workers), max_keepalive_connections=20),
+                retries=REGISTRY_CONNECT_RETRIES
+            )
+        )
+        atexit.register(self.session.close)
+        
+        # Latest versions per (registry, package) for this scanner's lifetime
+        self._latest_version_cache: Dict[Tuple[str, str], str] = {}
+        self._latest_version_lock = threading.Lock()
+        
+        # OSV advisory details by id; several packages often share one advisory
+        self._advisory_cache: Dict[str, Dict] = {}
+        
+    @functools.cached_property
+    def project_type(self) -> str:
         """
-        Detect the type of project based on configuration files
+        Type of project, detected from its configuration files
+        
+        The repository root is listed once and the result kept, since the
+        configuration files don't change during a run.
         
         Returns:
             str: Project type (npm, maven, pip, etc.)
         """
-        if os.path.exists(os.path.join(self.repo_path, "package.json")):
+        try:
+            with os.scandir(self.repo_path) as entries:
+                names = {entry.name for entry in entries}
+        except OSError:
+            return "unknown"
+            
+        if "package.json" in names:
             return "npm"
-        elif os.path.exists(os.path.join(self.repo_path, "pom.xml")):
+        elif "pom.xml" in names:
             return "maven"
-        elif os.path.exists(os.path.join(self.repo_path, "requirements.txt")) or \
-             os.path.exists(os.path.join(self.repo_path, "setup.py")):
+        elif "requirements.txt" in names or "setup.py" in names:
             return "pip"
-        elif os.path.exists(os.path.join(self.repo_path, "build.gradle")) or \
-             os.path.exists(os.path.join(self.repo_path, "build.gradle.kts")):
+        elif "build.gradle" in names or "build.gradle.kts" in names:
             return "gradle"
         else:
             return "unknown"
             
+    def detect_project_type(self) -> str:
+        """
+        Detect the type of project based on configuration files
+        
+        Returns:
+            str: Project type (npm, maven, pip, etc.)
+        """
+        return self.project_type
+            
     def scan_dependencies(self) -> List[Dict]:
         """
         Scan the repository for dependencies
@@ -47,7 +366,7 @@ class DependencyScanner:
         Returns:
             List[Dict]: List of dependencies with their details
         """
-        project_type = self.detect_project_type()
+        project_type = self.project_type
         
         if project_type == "npm":
             return self._scan_npm_dependencies()
@@ -68,8 +387,8 @@ class DependencyScanner:
             List[Dict]: List of npm dependencies
         """
         package_json_path = os.path.join(self.repo_path, "package.json")
-        with open(package_json_path, 'r') as f:
-            package_data = json.load(f)
+        with open(package_json_path, 'rb') as f:
+            package_data = _json_loads(f.read())
             
         dependencies = []
         
@@ -94,91 +413,156 @@ class DependencyScanner:
                 })
                 
         # Get latest versions and vulnerabilities
-        for dep in dependencies:
-            latest_version = self._get_npm_latest_version(dep["name"])
-            dep["latest_version"] = latest_version
-            
-            # Check if update is available
-            if latest_version != dep["current_version"]:
-                try:
-                    current_semver = semver.VersionInfo.parse(dep["current_version"])
-                    latest_semver = semver.VersionInfo.parse(latest_version)
-                    
-                    if latest_semver.major > current_semver.major:
-                        dep["update_type"] = "major"
-                    elif latest_semver.minor > current_semver.minor:
-                        dep["update_type"] = "minor"
-                    else:
-                        dep["update_type"] = "patch"
-                except:
-                    dep["update_type"] = "unknown"
-            else:
-                dep["update_type"] = "none"
-                
-            # Get vulnerability information
-            vulnerabilities = self._check_vulnerabilities(dep["name"], dep["current_version"])
-            dep["vulnerabilities"] = vulnerabilities
-            
-        return dependencies
+        return self._enrich_dependencies(dependencies, self._get_npm_latest_version, _parse_semver_version, "npm")
     
     def _scan_pip_dependencies(self) -> List[Dict]:
         """
-        Scan Python dependencies from requirements.txt
+        Scan Python dependencies from requirements.txt and pyproject.toml
+        
+        Each dependency records the file declaring it ("source", relative to the
+        repository) and its version specifier, so the updater can rewrite that
+        declaration in place.
         
         Returns:
             List[Dict]: List of Python dependencies
         """
         requirements_path = os.path.join(self.repo_path, "requirements.txt")
-        if not os.path.exists(requirements_path):
-            return []
+        pyproject_path = os.path.join(self.repo_path, "pyproject.toml")
+        
+        requirements = []
+        if os.path.exists(requirements_path):
+            requirements.extend(self._iter_requirements_file(requirements_path, set()))
+        if tomllib is not None and os.path.exists(pyproject_path):
+            requirements.extend(self._iter_pyproject_requirements(pyproject_path))
             
         dependencies = []
+        seen_names = set()
         
-        with open(requirements_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                    
-                # Parse package name and version
-                if '==' in line:
-                    name, current_version = line.split('==', 1)
-                    name = name.strip()
-                    current_version = current_version.strip()
-                    
-                    dependencies.append({
-                        "name": name,
-                        "current_version": current_version,
-                        "type": "production"
-                    })
+        for requirement, source_path in requirements:
+            current_version = self._requirement_version(requirement)
+            if current_version is None or requirement.name.lower() in seen_names:
+                continue
+            seen_names.add(requirement.name.lower())
+            
+            dependencies.append({
+                "name": requirement.name,
+                "current_version": current_version,
+                "type": "production",
+                "source": os.path.relpath(source_path, self.repo_path),
+                "specifier": str(requirement.specifier)
+            })
         
         # Get latest versions and vulnerabilities
-        for dep in dependencies:
-            latest_version = self._get_pypi_latest_version(dep["name"])
-            dep["latest_version"] = latest_version
-            
-            # Check if update is available
-            if latest_version != dep["current_version"]:
-                try:
-                    current_ver = version.parse(dep["current_version"])
-                    latest_ver = version.parse(latest_version)
+        return self._enrich_dependencies(dependencies, self._get_pypi_latest_version, _parse_pep440_version, "pip")
+    
+    def _iter_requirements_file(self,
+                                requirements_path: str,
+                                visited: Set[str]) -> Iterator[Tuple[Requirement, str]]:
+        """
+        Stream the requirements out of a requirements file, following -r includes
+        
+        Comments, continuation lines, environment markers and extras are handled.
+        Editable installs, constraints files and other options are skipped, and so
+        are requirements the updater can't rewrite in place: hash-pinned ones and
+        ones whose version specifier continues on the next line.
+        
+        Args:
+            requirements_path: Path to the requirements file
+            visited: Files already read, so include cycles terminate
+            
+        Returns:
+            Iterator[Tuple[Requirement, str]]: Parsed requirements with the file declaring each, in file order
+        """
+        requirements_path = os.path.abspath(requirements_path)
+        if requirements_path in visited:
+            return
+        visited.add(requirements_path)
+        
+        try:
+            with open(requirements_path, 'r') as f:
+                logical_line = ""
+                # First physical line of a continued requirement, the one the updater rewrites
+                first_line = None
+                for line in f:
+                    line = line.rstrip("\n")
+                    if line.endswith("\\"):
+                        if not logical_line:
+                            first_line = line[:-1]
+                        logical_line += line[:-1] + " "
+                        continue
+                    if not logical_line:
+                        first_line = None
+                    logical_line, line = "", logical_line + line
                     
-                    if latest_ver.major > current_ver.major:
-                        dep["update_type"] = "major"
-                    elif latest_ver.minor > current_ver.minor:
-                        dep["update_type"] = "minor"
-                    else:
-                        dep["update_type"] = "patch"
-                except:
-                    dep["update_type"] = "unknown"
-            else:
-                dep["update_type"] = "none"
-                
-            # Get vulnerability information
-            vulnerabilities = self._check_vulnerabilities(dep["name"], dep["current_version"])
-            dep["vulnerabilities"] = vulnerabilities
+                    # Comments start at a '#' at the line start or after whitespace
+                    line = re.sub(r'(^|\s)#.*$', '', line).strip()
+                    if not line:
+                        continue
+                        
+                    if line.startswith("-"):
+                        option, _, value = line.partition(" ")
+                        if option in ("-r", "--requirement") or option.startswith("--requirement="):
+                            include = value.strip() or option.partition("=")[2]
+                            yield from self._iter_requirements_file(
+                                os.path.join(os.path.dirname(requirements_path), include), visited
+                            )
+                        continue
+                        
+                    # Per-requirement options such as --hash follow the requirement itself
+                    line, _, options = line.partition(" --")
+                    
+                    # A new version would need new hashes, and the updater edits single lines
+                    if "hash" in options or (first_line is not None and line.strip() not in first_line):
+                        continue
+                        
+                    try:
+                        yield Requirement(line), requirements_path
+                    except InvalidRequirement:
+                        continue
+        except OSError as e:
+            print(f"Error reading {requirements_path}: {e}")
+    
+    def _iter_pyproject_requirements(self, pyproject_path: str) -> Iterator[Tuple[Requirement, str]]:
+        """
+        Stream the [project] dependencies out of a pyproject.toml
+        
+        Args:
+            pyproject_path: Path to the pyproject.toml
             
-        return dependencies
+        Returns:
+            Iterator[Tuple[Requirement, str]]: Parsed requirements with the file declaring them, in file order
+        """
+        try:
+            with open(pyproject_path, 'rb') as f:
+                project = tomllib.load(f).get("project", {})
+        except (OSError, tomllib.TOMLDecodeError) as e:
+            print(f"Error reading pyproject.toml: {e}")
+            return
+            
+        for line in project.get("dependencies", []):
+            try:
+                yield Requirement(line), pyproject_path
+            except InvalidRequirement:
+                continue
+    
+    def _requirement_version(self, requirement: Requirement) -> Optional[str]:
+        """
+        Get the version a requirement is pinned to or, failing that, its lower bound
+        
+        Args:
+            requirement: Parsed requirement
+            
+        Returns:
+            Optional[str]: The version, or None if the requirement names no usable version
+        """
+        lower_bound = None
+        for specifier in requirement.specifier:
+            if specifier.operator in ("==", "===") and "*" not in specifier.version:
+                return specifier.version
+            if specifier.operator in (">=", "~="):
+                lower_bound = specifier.version
+                
+        return lower_bound
     
     def _scan_maven_dependencies(self) -> List[Dict]:
         """
@@ -187,21 +571,20 @@ class DependencyScanner:
         Returns:
             List[Dict]: List of Maven dependencies
         """
-        # This is a simplified implementation
-        # A real implementation would parse the XML properly
         pom_path = os.path.join(self.repo_path, "pom.xml")
         if not os.path.exists(pom_path):
             return []
             
         dependencies = []
         
-        with open(pom_path, 'r') as f:
-            content = f.read()
-            
-        # Very simple regex-based extraction
-        dep_pattern = r'<dependency>.*?<groupId>(.*?)</groupId>.*?<artifactId>(.*?)</artifactId>.*?<version>(.*?)</version>.*?</dependency>'
-        for match in re.finditer(dep_pattern, content, re.DOTALL):
-            group_id, artifact_id, current_version = match.groups()
+        try:
+            pom_dependencies = self._parse_pom_dependencies(pom_path)
+        except ElementTree.ParseError as e:
+            print(f"Error parsing pom.xml, falling back to pattern matching: {e}")
+            with open(pom_path, 'r') as f:
+                pom_dependencies = [match.groups() for match in _MAVEN_DEP_RE.finditer(f.read())]
+                
+        for group_id, artifact_id, current_version in pom_dependencies:
             name = f"{group_id}:{artifact_id}"
             
             dependencies.append({
@@ -211,32 +594,80 @@ class DependencyScanner:
             })
         
         # Get latest versions and vulnerabilities
-        for dep in dependencies:
-            latest_version = self._get_maven_latest_version(dep["name"])
-            dep["latest_version"] = latest_version
-            
-            # Check if update is available
-            if latest_version != dep["current_version"]:
-                try:
-                    current_ver = version.parse(dep["current_version"])
-                    latest_ver = version.parse(latest_version)
-                    
-                    if latest_ver.major > current_ver.major:
-                        dep["update_type"] = "major"
-                    elif latest_ver.minor > current_ver.minor:
-                        dep["update_type"] = "minor"
-                    else:
-                        dep["update_type"] = "patch"
-                except:
-                    dep["update_type"] = "unknown"
-            else:
-                dep["update_type"] = "none"
+        return self._enrich_dependencies(dependencies, self._get_maven_latest_version, _parse_pep440_version, "maven")
+    
+    def _parse_pom_dependencies(self, pom_path: str) -> List[Tuple[str, str, str]]:
+        """
+        Stream the dependencies out of a pom.xml
+        
+        Elements are detached from the tree as soon as they have been read, so
+        memory stays flat on large poms. ${property} references are resolved
+        from <properties> and the project's own coordinates. A dependency uses
+        the version in its own declaration, and falls back to the one declared
+        in <dependencyManagement> when it has none.
+        
+        Args:
+            pom_path: Path to the pom.xml
+            
+        Returns:
+            List[Tuple[str, str, str]]: (groupId, artifactId, version) per dependency
+            
+        Raises:
+            ElementTree.ParseError: If the file is not well-formed XML
+        """
+        properties = {}
+        declared = []
+        path = []
+        parents = []
+        
+        for event, elem in ElementTree.iterparse(pom_path, events=("start", "end")):
+            # Tags carry the POM namespace when one is declared; compare local names
+            tag = elem.tag.rpartition("}")[2]
+            if event == "start":
+                path.append(tag)
+                parents.append(elem)
+                continue
                 
-            # Get vulnerability information
-            vulnerabilities = self._check_vulnerabilities(dep["name"], dep["current_version"])
-            dep["vulnerabilities"] = vulnerabilities
+            path.pop()
+            parents.pop()
+            parent = path[-1] if path else None
             
-        return dependencies
+            if tag == "dependency":
+                fields = {child.tag.rpartition("}")[2]: (child.text or "").strip() for child in elem}
+                if fields.get("groupId") and fields.get("artifactId"):
+                    in_management = "dependencyManagement" in path
+                    declared.append((fields["groupId"], fields["artifactId"], fields.get("version", ""), in_management))
+            elif parent == "properties":
+                properties[tag] = (elem.text or "").strip()
+            elif len(path) == 1 and tag in ("groupId", "artifactId", "version"):
+                properties[f"project.{tag}"] = (elem.text or "").strip()
+                
+            # A <dependency> still needs its fields when it ends; everything else is done with
+            if parent is not None and parent != "dependency":
+                parents[-1].remove(elem)
+                
+        def resolve(value: str) -> str:
+            return _MAVEN_PROPERTY_RE.sub(lambda m: properties.get(m.group(1), m.group(0)), value)
+            
+        managed_versions = {}
+        for group_id, artifact_id, dep_version, in_management in declared:
+            if in_management and dep_version:
+                managed_versions.setdefault((resolve(group_id), resolve(artifact_id)), resolve(dep_version))
+                
+        # A dependency listed in both <dependencyManagement> and <dependencies> is
+        # reported once, with the version from <dependencies> when it declares one
+        dependencies = {}
+        from_management = {}
+        for group_id, artifact_id, dep_version, in_management in declared:
+            key = (resolve(group_id), resolve(artifact_id))
+            dep_version = resolve(dep_version) if dep_version else managed_versions.get(key)
+            if not dep_version:
+                continue
+            if key not in dependencies or (from_management[key] and not in_management):
+                dependencies[key] = dep_version
+                from_management[key] = in_management
+                
+        return [(group_id, artifact_id, dep_version) for (group_id, artifact_id), dep_version in dependencies.items()]
     
     def _scan_gradle_dependencies(self) -> List[Dict]:
         """
@@ -258,9 +689,7 @@ class DependencyScanner:
             content = f.read()
             
         # Simple regex for Gradle dependencies
-        # This is a simplification and won't catch all formats
-        dep_pattern = r'implementation [\'"]([^:]+):([^:]+):([^\'"]+)[\'"]'
-        for match in re.finditer(dep_pattern, content):
+        for match in _GRADLE_DEP_RE.finditer(content):
             group_id, artifact_id, current_version = match.groups()
             name = f"{group_id}:{artifact_id}"
             
@@ -270,34 +699,64 @@ class DependencyScanner:
                 "type": "production"
             })
         
-        # Get latest versions and vulnerabilities
-        for dep in dependencies:
-            latest_version = self._get_maven_latest_version(dep["name"])  # Maven Central is used for Gradle too
-            dep["latest_version"] = latest_version
-            
-            # Check if update is available
-            if latest_version != dep["current_version"]:
-                try:
-                    current_ver = version.parse(dep["current_version"])
-                    latest_ver = version.parse(latest_version)
-                    
-                    if latest_ver.major > current_ver.major:
-                        dep["update_type"] = "major"
-                    elif latest_ver.minor > current_ver.minor:
-                        dep["update_type"] = "minor"
-                    else:
-                        dep["update_type"] = "patch"
-                except:
-                    dep["update_type"] = "unknown"
-            else:
-                dep["update_type"] = "none"
-                
-            # Get vulnerability information
-            vulnerabilities = self._check_vulnerabilities(dep["name"], dep["current_version"])
-            dep["vulnerabilities"] = vulnerabilities
+        # Get latest versions and vulnerabilities; Maven Central is used for Gradle too
+        return self._enrich_dependencies(dependencies, self._get_maven_latest_version, _parse_pep440_version, "gradle")
+    
+    def _enrich_dependencies(self,
+                             dependencies: List[Dict],
+                             get_latest_version: Callable[[str], str],
+                             parse_version: Callable[[str], Optional[object]],
+                             project_type: str) -> List[Dict]:
+        """
+        Add latest version, update type and vulnerabilities to each dependency
+        
+        Dependencies are looked up concurrently, since each lookup is a blocking
+        registry request. Vulnerabilities for all of them are then fetched in batches.
+        
+        Args:
+            dependencies: Dependencies parsed from the project configuration
+            get_latest_version: Registry lookup for the package's latest version
+            parse_version: Version parser for the ecosystem's version scheme
+            project_type: Project type the dependencies come from
             
+        Returns:
+            List[Dict]: The dependencies, in their original order
+        """
+        if not dependencies:
+            return dependencies
+            
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(dependencies))) as executor:
+            list(executor.map(
+                lambda dep: self._enrich_dependency(dep, get_latest_version, parse_version),
+                dependencies
+            ))
+            
+        self._check_vulnerabilities_batch(dependencies, project_type)
         return dependencies
     
+    def _enrich_dependency(self,
+                           dep: Dict,
+                           get_latest_version: Callable[[str], str],
+                           parse_version: Callable[[str], Optional[object]]) -> Dict:
+        """
+        Add latest version and update type to a dependency
+        
+        Args:
+            dep: Dependency parsed from the project configuration
+            get_latest_version: Registry lookup for the package's latest version
+            parse_version: Memoized version parser for the ecosystem's version scheme
+            
+        Returns:
+            Dict: The dependency, updated in place
+        """
+        latest_version = get_latest_version(dep["name"])
+        dep["latest_version"] = latest_version
+        
+        # Check if update is available
+        dep["update_type"] = _classify_update(dep["current_version"], latest_version, parse_version)
+        
+        return dep
+    
     def _get_npm_latest_version(self, package_name: str) -> str:
         """
         Get the latest version of an npm package
@@ -310,11 +769,12 @@ class DependencyScanner:
         """
         try:
             url = f"https://registry.npmjs.org/{package_name}"
-            response = requests.get(url)
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("dist-tags", {}).get("latest", "unknown")
-            return "unknown"
+            return self._get_cached_latest_version(
+                "npm",
+                package_name,
+                url,
+                lambda data: data.get("dist-tags", {}).get("latest", "unknown")
+            )
         except Exception as e:
             print(f"Error getting npm version: {e}")
             return "unknown"
@@ -331,11 +791,12 @@ class DependencyScanner:
         """
         try:
             url = f"https://pypi.org/pypi/{package_name}/json"
-            response = requests.get(url)
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("info", {}).get("version", "unknown")
-            return "unknown"
+            return self._get_cached_latest_version(
+                "pypi",
+                package_name,
+                url,
+                lambda data: data.get("info", {}).get("version", "unknown")
+            )
         except Exception as e:
             print(f"Error getting PyPI version: {e}")
             return "unknown"
@@ -355,88 +816,239 @@ class DependencyScanner:
             group_path = group_id.replace(".", "/")
             url = f"https://search.maven.org/solrsearch/select?q=g:{group_id}+AND+a:{artifact_id}&rows=1&wt=json"
             
-            response = requests.get(url)
-            if response.status_code == 200:
-                data = response.json()
-                if data["response"]["numFound"] > 0:
-                    return data["response"]["docs"][0]["latestVersion"]
-            return "unknown"
+            return self._get_cached_latest_version(
+                "maven",
+                package_name,
+                url,
+                lambda data: data["response"]["docs"][0]["latestVersion"] if data["response"]["numFound"] > 0 else "unknown"
+            )
         except Exception as e:
             print(f"Error getting Maven version: {e}")
             return "unknown"
     
-    def _check_vulnerabilities(self, package_name: str, version: str) -> List[Dict]:
+    def _get_cached_latest_version(self,
+                                   registry: str,
+                                   package_name: str,
+                                   url: str,
+                                   extract_version: Callable[[Dict], str]) -> str:
         """
-        Check for known vulnerabilities in a package
+        Get a package's latest version from memory, the disk cache or the registry
+        
+        A cached entry younger than REGISTRY_CACHE_TTL is used as is. An older one is
+        revalidated with If-None-Match, so an unchanged package costs a 304 instead of
+        downloading its metadata again.
         
         Args:
+            registry: Registry name, used in cache keys
             package_name: Name of the package
-            version: Version of the package
+            url: Registry metadata URL for the package
+            extract_version: Function returning the latest version from the metadata
             
         Returns:
-            List[Dict]: List of vulnerabilities
+            str: Latest version, or "unknown" if the registry has no answer
         """
-        # This is a simplified implementation
-        # A real implementation would query NVD or other vulnerability databases
+        key = (registry, package_name)
+        with self._latest_version_lock:
+            if key in self._latest_version_cache:
+                return self._latest_version_cache[key]
+                
+        cache_path = os.path.join(REGISTRY_CACHE_DIR, registry, f"{urllib.parse.quote(package_name, safe='')}.json")
+        entry = None
         try:
-            # For npm packages, we can use the npm audit API
-            if os.path.exists(os.path.join(self.repo_path, "package.json")):
-                temp_dir = os.path.join(os.getcwd(), "temp_audit")
-                os.makedirs(temp_dir, exist_ok=True)
+            with open(cache_path, 'rb') as f:
+                entry = _json_loads(f.read())
+        except (OSError, ValueError):
+            pass
+            
+        if entry is not None and time.time() - entry["fetched_at"] < REGISTRY_CACHE_TTL:
+            latest_version = entry["version"]
+        else:
+            headers = {"If-None-Match": entry["etag"]} if entry is not None and entry.get("etag") else {}
+            response = self._registry_request("GET", url, headers=headers)
+            
+            if response.status_code == 304:
+                latest_version = entry["version"]
+                etag = entry["etag"]
+            elif response.status_code == 200:
+                latest_version = extract_version(_json_loads(response.content))
+                etag = response.headers.get("ETag")
+            else:
+                return "unknown"
                 
-                with open(os.path.join(temp_dir, "package.json"), "w") as f:
-                    json.dump({
-                        "name": "temp-audit",
-                        "version": "1.0.0",
-                        "dependencies": {
-                            package_name: version
-                        }
-                    }, f)
+            self._write_registry_cache(cache_path, {"version": latest_version, "etag": etag, "fetched_at": time.time()})
+            
+        with self._latest_version_lock:
+            self._latest_version_cache[key] = latest_version
+        return latest_version
+    
+    @_retry_registry
+    def _registry_request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a registry request, retrying rate limits and server errors with backoff
+        
+        Args:
+            method: HTTP method
+            url: Request URL
+            **kwargs: Extra arguments for httpx.Client.request
+            
+        Returns:
+            httpx.Response: The response; other error statuses are returned, not raised
+            
+        Raises:
+            httpx.HTTPError: If the request still fails after REGISTRY_MAX_ATTEMPTS attempts
+        """
+        response = self.session.request(method, url, **kwargs)
+        if response.status_code in _RETRY_STATUSES:
+            response.raise_for_status()
+        return response
+    
+    def _write_registry_cache(self, cache_path: str, entry: Dict) -> None:
+        """
+        Atomically write a registry cache entry
+        
+        Args:
+            cache_path: Path of the cache file
+            entry: Cached version, ETag and fetch time
+        """
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Error caching registry response: {e}")
+    
+    def _check_vulnerabilities_batch(self, dependencies: List[Dict], project_type: str) -> None:
+        """
+        Look up known vulnerabilities for all dependencies using OSV batch queries
+        
+        Sets "vulnerabilities" on every dependency. Queries are sent in chunks of
+        OSV_BATCH_SIZE, concurrently, and advisory details are fetched once per advisory.
+        
+        Args:
+            dependencies: Dependencies with name and current_version
+            project_type: Project type the dependencies come from
+        """
+        for dep in dependencies:
+            dep["vulnerabilities"] = []
+            
+        ecosystem = OSV_ECOSYSTEMS.get(project_type)
+        if ecosystem is None or not dependencies:
+            return
+            
+        chunks = [dependencies[i:i + OSV_BATCH_SIZE] for i in range(0, len(dependencies), OSV_BATCH_SIZE)]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+            chunk_results = list(executor.map(lambda chunk: self._query_osv_batch(chunk, ecosystem), chunks))
+            
+        # Batch results only carry advisory ids
+        dep_advisory_ids = [
+            [vuln["id"] for vuln in result.get("vulns", [])]
+            for results in chunk_results
+            for result in results
+        ]
+        advisory_ids = list(dict.fromkeys(advisory_id for ids in dep_advisory_ids for advisory_id in ids))
+        
+        if advisory_ids:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(advisory_ids))) as executor:
+                list(executor.map(self._get_osv_advisory, advisory_ids))
                 
-                try:
-                    result = subprocess.run(
-                        ["npm", "audit", "--json"],
-                        cwd=temp_dir,
-                        capture_output=True,
-                        text=True
-                    )
-                    
-                    # Clean up
-                    import shutil
-                    shutil.rmtree(temp_dir)
-                    
-                    if result.returncode == 0:
-                        return []  # No vulnerabilities
-                        
-                    try:
-                        audit_data = json.loads(result.stdout)
-                        vulnerabilities = []
-                        
-                        if "vulnerabilities" in audit_data:
-                            for vuln_name, vuln_data in audit_data["vulnerabilities"].items():
-                                if vuln_name == package_name:
-                                    vulnerabilities.append({
-                                        "severity": vuln_data.get("severity", "unknown"),
-                                        "description": vuln_data.get("title", "No description available"),
-                                        "fixed_in": vuln_data.get("fixAvailable", {}).get("version", "unknown")
-                                    })
-                        
-                        return vulnerabilities
-                    except json.JSONDecodeError:
-                        return []
-                except:
-                    # Clean up in case of error
-                    import shutil
-                    shutil.rmtree(temp_dir)
-                    return []
-            
-            # For other package types, we would query vulnerability databases
-            # This is a placeholder for demonstration
-            return []
+        for dep, ids in zip(dependencies, dep_advisory_ids):
+            for advisory_id in ids:
+                advisory = self._advisory_cache.get(advisory_id)
+                if advisory is not None:
+                    dep["vulnerabilities"].append(self._summarize_advisory(advisory, dep["name"]))
+    
+    def _query_osv_batch(self, dependencies: List[Dict], ecosystem: str) -> List[Dict]:
+        """
+        Send one OSV batch query
+        
+        Args:
+            dependencies: Up to OSV_BATCH_SIZE dependencies
+            ecosystem: OSV ecosystem name
             
+        Returns:
+            List[Dict]: One result per dependency, in order; empty results on error
+        """
+        queries = [
+            {"package": {"name": dep["name"], "ecosystem": ecosystem}, "version": dep["current_version"]}
+            for dep in dependencies
+        ]
+        
+        try:
+            response = self._registry_request("POST", OSV_QUERY_BATCH_URL, json={"queries": queries})
+            if response.status_code == 200:
+                return _json_loads(response.content).get("results", [])
+            print(f"Error checking vulnerabilities: {response.status_code} - {response.text}")
         except Exception as e:
             print(f"Error checking vulnerabilities: {e}")
-            return []
+            
+        return [{} for _ in dependencies]
+    
+    def _get_osv_advisory(self, advisory_id: str) -> None:
+        """
+        Fetch an OSV advisory into the advisory cache
+        
+        Args:
+            advisory_id: OSV advisory id
+        """
+        if advisory_id in self._advisory_cache:
+            return
+            
+        try:
+            response = self._registry_request("GET", OSV_VULN_URL.format(advisory_id))
+            if response.status_code == 200:
+                self._advisory_cache[advisory_id] = _json_loads(response.content)
+        except Exception as e:
+            print(f"Error fetching advisory {advisory_id}: {e}")
+    
+    def _summarize_advisory(self, advisory: Dict, package_name: str) -> Dict:
+        """
+        Reduce an OSV advisory to the vulnerability fields used by the tool
+        
+        Args:
+            advisory: OSV advisory
+            package_name: Package the advisory was reported for
+            
+        Returns:
+            Dict: Severity, description and first fixed version
+        """
+        # Only GitHub advisories carry a rating; others (PYSEC, ...) are rated from their CVSS vector
+        severity = _OSV_SEVERITIES.get(str(advisory.get("database_specific", {}).get("severity", "")).lower(), "unknown")
+        if severity == "unknown":
+            scores = [
+                _cvss3_base_score(entry.get("score", ""))
+                for entry in advisory.get("severity", [])
+                if entry.get("type") == "CVSS_V3"
+            ]
+            scores = [score for score in scores if score is not None]
+            if scores:
+                severity = _cvss_severity(max(scores))
+                
+        fixed_in = "unknown"
+        for affected in advisory.get("affected", []):
+            package = affected.get("package", {})
+            # PyPI names match regardless of case and of -, _ and . separators (PEP 503)
+            if package.get("ecosystem") == "PyPI":
+                if canonicalize_name(package.get("name", "")) != canonicalize_name(package_name):
+                    continue
+            elif package.get("name") != package_name:
+                continue
+            fixed_versions = [
+                event["fixed"]
+                for version_range in affected.get("ranges", [])
+                for event in version_range.get("events", [])
+                if "fixed" in event
+            ]
+            if fixed_versions:
+                fixed_in = fixed_versions[0]
+                break
+                
+        return {
+            "severity": severity,
+            "description": advisory.get("summary") or advisory.get("details") or "No description available",
+            "fixed_in": fixed_in
+        }
     
     def get_upgrade_candidates(self, min_severity: str = "medium") -> List[Dict]:
         """
@@ -448,38 +1060,64 @@ class DependencyScanner:
         Returns:
             List[Dict]: List of upgrade candidates with details
         """
-        all_dependencies = self.scan_dependencies()
-        
         # Filter dependencies that need upgrade
-        upgrade_candidates = []
-        
-        for dep in all_dependencies:
-            # Check if there's a newer version
-            if dep["latest_version"] != "unknown" and dep["latest_version"] != dep["current_version"]:
-                # Check if there are vulnerabilities
-                has_vulnerabilities = False
-                for vuln in dep.get("vulnerabilities", []):
-                    severity = vuln.get("severity", "").lower()
-                    if severity in ["critical", "high"] or (severity == "medium" and min_severity in ["medium", "low"]) or (severity == "low" and min_severity == "low"):
-                        has_vulnerabilities = True
-                        break
-                
-                upgrade_priority = "low"
-                if has_vulnerabilities:
-                    upgrade_priority = "high"
-                elif dep["update_type"] == "patch":
-                    upgrade_priority = "medium"
-                
-                upgrade_candidates.append({
-                    "name": dep["name"],
-                    "current_version": dep["current_version"],
-                    "latest_version": dep["latest_version"],
-                    "update_type": dep["update_type"],
-                    "vulnerabilities": dep.get("vulnerabilities", []),
-                    "priority": upgrade_priority
-                })
+        upgrade_candidates = [
+            candidate for candidate in (
+                self._to_upgrade_candidate(dep, min_severity) for dep in self.scan_dependencies()
+            )
+            if candidate is not None
+        ]
         
         # Sort by priority (high first)
-        upgrade_candidates.sort(key=lambda x: {"high": 0, "medium": 1, "low": 2}[x["priority"]])
+        upgrade_candidates.sort(key=lambda x: _PRIORITY_ORDER[x["priority"]])
         
         return upgrade_candidates
+    
+    def _to_upgrade_candidate(self, dep: Dict, min_severity: str) -> Optional[Dict]:
+        """
+        Turn a scanned dependency into an upgrade candidate
+        
+        Args:
+            dep: Dependency with its details
+            min_severity: Minimum vulnerability severity to consider (low, medium, high, critical)
+            
+        Returns:
+            Optional[Dict]: Upgrade candidate, or None if no newer version is known
+        """
+        # Check if there's a newer version
+        if dep["latest_version"] == "unknown" or dep["latest_version"] == dep["current_version"]:
+            return None
+            
+        # Skip requirements the updater couldn't move to the new version in place
+        if "specifier" in dep and not _specifier_allows_upgrade(dep["specifier"], dep["current_version"], dep["latest_version"]):
+            return None
+            
+        # Check if there are vulnerabilities
+        has_vulnerabilities = False
+        for vuln in dep.get("vulnerabilities", []):
+            severity = vuln.get("severity", "").lower()
+            if severity in ["critical", "high"] or (severity == "medium" and min_severity in ["medium", "low"]) or (severity == "low" and min_severity == "low"):
+                has_vulnerabilities = True
+                break
+        
+        upgrade_priority = "low"
+        if has_vulnerabilities:
+            upgrade_priority = "high"
+        elif dep["update_type"] == "patch":
+            upgrade_priority = "medium"
+        
+        candidate = {
+            "name": dep["name"],
+            "current_version": dep["current_version"],
+            "latest_version": dep["latest_version"],
+            "update_type": dep["update_type"],
+            "vulnerabilities": dep.get("vulnerabilities", []),
+            "priority": upgrade_priority
+        }
+        
+        # Where the dependency is declared, so the updater edits that declaration
+        for key in ("source", "specifier"):
+            if key in dep:
+                candidate[key] = dep[key]
+                
+        return candidate
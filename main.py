@@ -2,10 +2,11 @@
 import os
 import json
 import argparse
-from typing import Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
 from dotenv import load_dotenv
 
-from agent_core import AIAgent, Message
+from agent_core import Message, get_agent
 from dependency_scanner import DependencyScanner
 from code_impact_analyzer import CodeImpactAnalyzer
 from test_generator import TestGenerator
@@ -14,25 +15,102 @@ from pr_creator import PRCreator
 # Load environment variables
 load_dotenv()
 
+# Number of independent workflow steps (AI calls, branch update) run at once
+DEFAULT_CONCURRENCY = 4
+
+# Code change summary used when a patch bump is upgraded without AI planning
+VERSION_BUMP_SUMMARY = "Version bump only; no code changes were needed and the existing tests pass."
+
 class AutomatedUpgradeWorkflow:
-    def __init__(self, repo_path: str, use_claude: bool = True):
+    def __init__(self,
+                 repo_path: str,
+                 use_claude: bool = True,
+                 concurrency: int = DEFAULT_CONCURRENCY,
+                 use_batch: bool = False,
+                 use_cache: bool = False):
         """
         Initialize the automated upgrade workflow
         
         Args:
             repo_path: Path to the repository
             use_claude: If True, use Claude API, otherwise use OpenAI
+            concurrency: Maximum number of independent steps run at once
+            use_batch: If True, send AI requests through the provider's batch API
+            use_cache: If True, reuse AI responses cached by earlier runs
         """
         self.repo_path = repo_path
         self.use_claude = use_claude
+        self.concurrency = max(1, concurrency)
         
         # Initialize components
-        self.agent = AIAgent(use_claude=use_claude)
+        self.agent = get_agent(use_claude, use_batch, use_cache)
         self.scanner = DependencyScanner(repo_path)
         self.analyzer = CodeImpactAnalyzer(repo_path)
         self.test_generator = TestGenerator(repo_path)
         self.pr_creator = PRCreator(repo_path)
         
+    def _create_branch_and_update(self, target_dependency: Dict) -> Tuple[str, bool]:
+        """
+        Create the upgrade branch and update the dependency on it
+        
+        Args:
+            target_dependency: Upgrade candidate being upgraded
+            
+        Returns:
+            Tuple[str, bool]: Branch name ("" if it could not be created) and whether the update succeeded
+        """
+        branch_name = self.pr_creator.create_branch(
+            target_dependency["name"],
+            target_dependency["latest_version"]
+        )
+        
+        if not branch_name:
+            return branch_name, False
+            
+        # Update the dependency
+        print(f"📦 Updating dependency...")
+        update_success = self.pr_creator.update_dependency(
+            target_dependency["name"],
+            target_dependency["current_version"],
+            target_dependency["latest_version"],
+            source=target_dependency.get("source"),
+            specifier=target_dependency.get("specifier")
+        )
+        
+        return branch_name, update_success
+        
+    def _undo_branch_and_update(self, upgrade_future: Future, start_ref: str, dirty_before: Set[str]) -> None:
+        """
+        Put the repository back where it was after the AI plan failed
+        
+        Args:
+            upgrade_future: Future of the _create_branch_and_update call
+            start_ref: Branch or commit checked out before the upgrade started
+            dirty_before: Files that already had uncommitted changes, which are left alone
+        """
+        branch_name, _ = upgrade_future.result()
+        if not branch_name or not start_ref:
+            return
+            
+        print(f"↩️ AI planning failed, restoring {start_ref}...")
+        changed_files = [path for path in self.pr_creator.changed_files() if path not in dirty_before]
+        self.pr_creator.restore_branch(start_ref, changed_files)
+        
+    @staticmethod
+    def _is_plain_version_bump(target_dependency: Dict, breaking_changes: Dict) -> bool:
+        """
+        Check whether an upgrade is expected to need no code changes
+        
+        Args:
+            target_dependency: Upgrade candidate being upgraded
+            breaking_changes: Breaking change analysis for the upgrade
+            
+        Returns:
+            bool: True for patch updates the analyzer rates as low risk
+        """
+        return (target_dependency.get("update_type") == "patch" and
+                breaking_changes.get("risk_assessment") == "low")
+        
     def run(self, dependency_name: Optional[str] = None, min_severity: str = "medium") -> Dict:
         """
         Run the automated upgrade workflow
@@ -84,38 +162,94 @@ class AutomatedUpgradeWorkflow:
             target_dependency["latest_version"]
         )
         
-        # Get upgrade strategy from AI
-        print(f"🧠 Getting upgrade strategy from AI...")
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return self._plan_and_upgrade(executor, target_dependency, api_usage, api_examples, breaking_changes)
+            
+    def _plan_and_upgrade(self,
+                          executor: ThreadPoolExecutor,
+                          target_dependency: Dict,
+                          api_usage: List[Dict],
+                          api_examples: List[str],
+                          breaking_changes: Dict) -> Dict:
+        """
+        Get the AI plan and apply the upgrade, then test, commit and open the PR
+        
+        The upgrade strategy, the code change prediction and the AI test cases
+        don't depend on each other, so they run concurrently (at most
+        self.concurrency at a time), overlapped with the branch and
+        dependency update. If the strategy or prediction call fails, the
+        original branch is checked out again and the manifest restored. Low-risk patch bumps skip the strategy and prediction unless the tests
+        fail after the update.
+        
+        Args:
+            executor: Executor running the independent steps
+            target_dependency: Upgrade candidate being upgraded
+            api_usage: Usage locations of the dependency
+            api_examples: Code examples showing the dependency's API usage
+            breaking_changes: Breaking change analysis for the upgrade
+            
+        Returns:
+            Dict: Results of the workflow
+        """
         project_info = {
             "name": os.path.basename(os.path.abspath(self.repo_path)),
-            "type": self.scanner.detect_project_type()
+            "type": self.scanner.project_type
         }
         
-        strategy = self.agent.analyze_upgrade_strategy(
-            project_info=project_info,
-            dependencies=[target_dependency],
-            code_samples=api_examples
-        )
+        # Low-risk patch releases shouldn't need code changes, so planning only
+        # happens for them if the tests fail after the bump
+        plan_with_ai = not self._is_plain_version_bump(target_dependency, breaking_changes)
+        strategy_future = code_changes_future = None
         
-        print(f"📝 AI Upgrade Strategy:\n{strategy}")
+        if plan_with_ai:
+            # Get upgrade strategy from AI
+            print(f"🧠 Getting upgrade strategy from AI...")
+            strategy_future = executor.submit(
+                self.agent.analyze_upgrade_strategy,
+                project_info=project_info,
+                dependencies=[target_dependency],
+                code_samples=api_examples
+            )
+            
+            # Get code changes prediction from AI
+            print(f"🧠 Predicting necessary code changes...")
+            code_changes_future = executor.submit(
+                self.agent.predict_code_changes,
+                dependency_name=target_dependency["name"],
+                current_version=target_dependency["current_version"],
+                target_version=target_dependency["latest_version"],
+                api_usage_examples=api_examples
+            )
+        else:
+            print(f"⏩ Low-risk patch update, skipping AI planning")
         
-        # Get code changes prediction from AI
-        print(f"🧠 Predicting necessary code changes...")
-        code_changes = self.agent.predict_code_changes(
+        changed_apis = [{"name": usage.get("import_path", ""), "context": usage.get("context", "")} for usage in api_usage]
+        test_cases_future = executor.submit(
+            self.agent.generate_test_cases,
             dependency_name=target_dependency["name"],
-            current_version=target_dependency["current_version"],
-            target_version=target_dependency["latest_version"],
-            api_usage_examples=api_examples
+            changed_apis=changed_apis
         )
         
-        print(f"📝 Predicted Code Changes:\n{code_changes}")
+        # Remember where the repository was, so a failed AI plan can put it back
+        start_ref = self.pr_creator.current_ref()
+        dirty_before = set(self.pr_creator.changed_files())
         
-        # Create a branch for the upgrade
+        # Create a branch for the upgrade and update the dependency on it
         print(f"🌿 Creating branch for upgrade...")
-        branch_name = self.pr_creator.create_branch(
-            target_dependency["name"],
-            target_dependency["latest_version"]
-        )
+        upgrade_future = executor.submit(self._create_branch_and_update, target_dependency)
+        
+        code_changes = None
+        try:
+            if plan_with_ai:
+                print(f"📝 AI Upgrade Strategy:\n{strategy_future.result()}")
+                
+                code_changes = code_changes_future.result()
+                print(f"📝 Predicted Code Changes:\n{code_changes}")
+        except Exception:
+            self._undo_branch_and_update(upgrade_future, start_ref, dirty_before)
+            raise
+            
+        branch_name, update_success = upgrade_future.result()
         
         if not branch_name:
             return {
@@ -125,14 +259,6 @@ class AutomatedUpgradeWorkflow:
             
         print(f"✅ Created branch: {branch_name}")
         
-        # Update the dependency
-        print(f"📦 Updating dependency...")
-        update_success = self.pr_creator.update_dependency(
-            target_dependency["name"],
-            target_dependency["current_version"],
-            target_dependency["latest_version"]
-        )
-        
         if not update_success:
             return {
                 "success": False,
@@ -143,14 +269,7 @@ class AutomatedUpgradeWorkflow:
         
         # Generate tests
         print(f"🧪 Generating tests...")
-        changed_apis = [{"name": usage.get("import_path", ""), "context": usage.get("context", "")} for usage in api_usage]
-        
-        test_cases = self.agent.generate_test_cases(
-            dependency_name=target_dependency["name"],
-            changed_apis=changed_apis
-        )
-        
-        print(f"📝 Generated Test Cases:\n{test_cases}")
+        print(f"📝 Generated Test Cases:\n{test_cases_future.result()}")
         
         # Write test files
         test_data = self.test_generator.generate_test_cases(
@@ -179,6 +298,20 @@ class AutomatedUpgradeWorkflow:
         print(f"🧪 Running tests...")
         test_results = self.test_generator.run_tests()
         
+        if code_changes is None:
+            if test_results.get("success", False):
+                code_changes = VERSION_BUMP_SUMMARY
+            else:
+                # The bump alone broke something, so fall back to asking the AI
+                print(f"🧠 Tests failed after the version bump, predicting necessary code changes...")
+                code_changes = self.agent.predict_code_changes(
+                    dependency_name=target_dependency["name"],
+                    current_version=target_dependency["current_version"],
+                    target_version=target_dependency["latest_version"],
+                    api_usage_examples=api_examples
+                )
+                print(f"📝 Predicted Code Changes:\n{code_changes}")
+        
         # Push branch
         print(f"📤 Pushing branch...")
         push_success = self.pr_creator.push_branch(branch_name)
@@ -233,10 +366,13 @@ def main():
     parser.add_argument("--dependency", help="Specific dependency to upgrade")
     parser.add_argument("--min-severity", default="medium", choices=["low", "medium", "high", "critical"], help="Minimum vulnerability severity to consider")
     parser.add_argument("--use-claude", action="store_true", default=True, help="Use Claude AI (default: True)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help=f"Maximum number of independent steps (AI calls, branch and manifest update) run at once (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--batch", action="store_true", help="Send AI requests through the provider's batch API (half price, can take up to 24 hours per request)")
+    parser.add_argument("--cache", action="store_true", help="Reuse AI responses from earlier runs (cached on disk for 7 days)")
     
     args = parser.parse_args()
     
-    workflow = AutomatedUpgradeWorkflow(args.repo, args.use_claude)
+    workflow = AutomatedUpgradeWorkflow(args.repo, args.use_claude, args.concurrency, args.batch, args.cache)
     result = workflow.run(args.dependency, args.min_severity)
     
     if result["success"]:
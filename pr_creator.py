@@ -2,10 +2,99 @@
 import os
 import re
 import json
+import functools
 import subprocess
-from typing import Dict, List, Optional
+from xml.parsers import expat
+from typing import Dict, List, Optional, Tuple, Union
 from git import Repo
+from packaging.specifiers import InvalidSpecifier, SpecifierSet
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_MAVEN_PROPERTY_REF_RE = re.compile(r'^\$\{([^}]+)\}$')
+
+_GITHUB_HTTPS_RE = re.compile(r'https://github\.com/([^/]+)/([^/\.]+)')
+_GITHUB_SSH_RE = re.compile(r'git@github\.com:([^/]+)/([^/\.]+)')
+
+@functools.lru_cache(maxsize=None)
+def _maven_dependency_pattern(group_id: str, artifact_id: str) -> re.Pattern:
+    """
+    Compile the pom.xml pattern matching a dependency's version
+    
+    Args:
+        group_id: Maven groupId
+        artifact_id: Maven artifactId
+        
+    Returns:
+        re.Pattern: Pattern matching the dependency block up to its version
+    """
+    return re.compile(
+        f"<dependency>\\s*<groupId>{re.escape(group_id)}</groupId>\\s*"
+        f"<artifactId>{re.escape(artifact_id)}</artifactId>\\s*<version>[^<]+</version>"
+    )
+
+@functools.lru_cache(maxsize=None)
+def _gradle_dependency_pattern(group_id: str, artifact_id: str) -> re.Pattern:
+    """
+    Compile the build.gradle pattern matching a dependency declaration
+    
+    Args:
+        group_id: Maven groupId
+        artifact_id: Maven artifactId
+        
+    Returns:
+        re.Pattern: Pattern capturing the "group:artifact:" coordinate prefix
+    """
+    return re.compile(f"implementation ['\"]({re.escape(group_id)}:{re.escape(artifact_id)}:)[^'\"]+['\"]")
+
+# Version clauses the scanner reads a requirement's current version from
+_PIP_VERSION_OPERATORS = ("===", "==", ">=", "~=")
+
+@functools.lru_cache(maxsize=None)
+def _pip_requirement_pattern(dependency_name: str, in_pyproject: bool) -> re.Pattern:
+    """
+    Compile the pattern matching a requirement's declaration
+    
+    Package names match regardless of case and of "-", "_" and "." separators.
+    
+    Args:
+        dependency_name: Name of the Python package
+        in_pyproject: If True, match quoted requirements in pyproject.toml,
+            otherwise requirement lines of a requirements file
+        
+    Returns:
+        re.Pattern: Pattern capturing the name with its extras ("head") and the version specifier ("spec")
+    """
+    name = "[-_.]+".join(re.escape(part) for part in re.split(r"[-_.]+", dependency_name))
+    start = r"""(?<=["'])[ \t]*""" if in_pyproject else r"^[ \t]*"
+    # The specifier ends at a marker, comment, quote, continuation or per-requirement option
+    return re.compile(
+        rf"(?P<head>{start}{name}(?![\w.-])[ \t]*(?:\[[^\]\n]*\][ \t]*)?)"
+        rf"""(?P<spec>(?:(?! --)[^;#\n\\"'])*)""",
+        re.MULTILINE | re.IGNORECASE
+    )
+
+def _replace_file(path: str, content: Union[str, bytes]) -> None:
+    """
+    Atomically replace a file's content
+    
+    The content is written to a temporary file next to path and moved over it,
+    so an interrupted run never leaves a half-written manifest behind.
+    
+    Args:
+        path: Path of the file to replace
+        content: New text or bytes
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb' if isinstance(content, bytes) else 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 class PRCreator:
     def __init__(self, repo_path: str):
@@ -18,10 +107,57 @@ class PRCreator:
         self.repo_path = repo_path
         self.github_token = os.getenv("GITHUB_TOKEN")
         
+        # Keep-alive session so repeated GitHub API calls reuse one TLS connection
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=10,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504))
+        ))
+        self.session.headers.update({
+            "Authorization": f"token {self.github_token}",
+            "Accept": "application/vnd.github.v3+json"
+        })
+        
+        # Open PR lookups per branch as (ETag, PR details or None)
+        self._pr_listing_cache: Dict[str, Tuple[str, Optional[Dict]]] = {}
+        
+    @functools.cached_property
+    def _repo(self) -> Repo:
+        """
+        Open the repository once per instance
+        
+        Returns:
+            Repo: GitPython repository for repo_path
+        """
+        return Repo(self.repo_path)
+        
+    @functools.cached_property
+    def _github_coordinates(self) -> Optional[Tuple[str, str]]:
+        """
+        Parse the GitHub owner and repository name from the origin remote
+        
+        Assumes a GitHub URL like https://github.com/owner/repo.git
+        or git@github.com:owner/repo.git
+        
+        Returns:
+            Optional[Tuple[str, str]]: (owner, repo name), or None if the URL is not a GitHub URL
+        """
+        remote_url = self._repo.remote('origin').url
+        
+        if remote_url.startswith('https://'):
+            match = _GITHUB_HTTPS_RE.match(remote_url)
+        else:
+            match = _GITHUB_SSH_RE.match(remote_url)
+            
+        return match.groups() if match else None
+        
     def update_dependency(self, 
                         dependency_name: str, 
                         current_version: str, 
-                        target_version: str) -> bool:
+                        target_version: str,
+                        source: Optional[str] = None,
+                        specifier: Optional[str] = None) -> bool:
         """
         Update a dependency in the project configuration
         
@@ -29,16 +165,19 @@ class PRCreator:
             dependency_name: Name of the dependency
             current_version: Current version
             target_version: Target version
+            source: File declaring the dependency, relative to the repository
+                (pip only; defaults to requirements.txt)
+            specifier: Version specifier of that declaration, as reported by the scanner (pip only)
             
         Returns:
             bool: True if the update was successful
         """
-        project_type = self._detect_project_type()
+        project_type = self.project_type
         
         if project_type == "npm":
             return self._update_npm_dependency(dependency_name, target_version)
         elif project_type == "pip":
-            return self._update_pip_dependency(dependency_name, target_version)
+            return self._update_pip_dependency(dependency_name, current_version, target_version, source, specifier)
         elif project_type == "maven":
             return self._update_maven_dependency(dependency_name, target_version)
         elif project_type == "gradle":
@@ -46,25 +185,42 @@ class PRCreator:
         else:
             return False
     
-    def _detect_project_type(self) -> str:
+    @functools.cached_property
+    def project_type(self) -> str:
         """
-        Detect the type of project based on configuration files
+        Type of project, detected from its configuration files
+        
+        The repository root is listed once and the result kept, since the
+        configuration files don't change during a run.
         
         Returns:
             str: Project type (npm, maven, pip, etc.)
         """
-        if os.path.exists(os.path.join(self.repo_path, "package.json")):
+        try:
+            with os.scandir(self.repo_path) as entries:
+                names = {entry.name for entry in entries}
+        except OSError:
+            return "unknown"
+            
+        if "package.json" in names:
             return "npm"
-        elif os.path.exists(os.path.join(self.repo_path, "pom.xml")):
+        elif "pom.xml" in names:
             return "maven"
-        elif os.path.exists(os.path.join(self.repo_path, "requirements.txt")) or \
-             os.path.exists(os.path.join(self.repo_path, "setup.py")):
+        elif "requirements.txt" in names or "setup.py" in names:
             return "pip"
-        elif os.path.exists(os.path.join(self.repo_path, "build.gradle")) or \
-             os.path.exists(os.path.join(self.repo_path, "build.gradle.kts")):
+        elif "build.gradle" in names or "build.gradle.kts" in names:
             return "gradle"
         else:
             return "unknown"
+            
+    def _detect_project_type(self) -> str:
+        """
+        Detect the type of project based on configuration files
+        
+        Returns:
+            str: Project type (npm, maven, pip, etc.)
+        """
+        return self.project_type
     
     def _update_npm_dependency(self, dependency_name: str, target_version: str) -> bool:
         """
@@ -91,41 +247,88 @@ class PRCreator:
             print(f"Error updating npm dependency: {e}")
             return False
     
-    def _update_pip_dependency(self, dependency_name: str, target_version: str) -> bool:
+    def _update_pip_dependency(self,
+                               dependency_name: str,
+                               current_version: str,
+                               target_version: str,
+                               source: Optional[str] = None,
+                               specifier: Optional[str] = None) -> bool:
         """
-        Update a Python dependency in requirements.txt
+        Update a Python dependency where it is declared
+        
+        The version clause the current version was read from (==, ===, >= or ~=)
+        is rewritten in place in the declaring file, keeping the operator, extras,
+        markers and any other clauses. Only a dependency missing from the top-level
+        requirements.txt is appended to it as a new pin.
         
         Args:
             dependency_name: Name of the Python package
+            current_version: Current version
             target_version: Target version
+            source: Requirements file or pyproject.toml declaring the dependency,
+                relative to the repository (defaults to requirements.txt)
+            specifier: Version specifier of the declaration to rewrite (any declaration naming
+                current_version if None)
             
         Returns:
             bool: True if the update was successful
         """
-        requirements_path = os.path.join(self.repo_path, "requirements.txt")
+        requirements_path = os.path.join(self.repo_path, source or "requirements.txt")
         
         if not os.path.exists(requirements_path):
             return False
             
         try:
             with open(requirements_path, 'r') as f:
-                lines = f.readlines()
+                content = f.read()
+                
+            in_pyproject = os.path.basename(requirements_path) == "pyproject.toml"
+            operators = "|".join(map(re.escape, _PIP_VERSION_OPERATORS))
+            version_clause = re.compile(rf"({operators})(\s*){re.escape(current_version)}(?![\w.+!-])")
+            expected = SpecifierSet(specifier) if specifier is not None else None
+            declared = excluded = 0
+            
+            def rewrite(match: re.Match) -> str:
+                nonlocal declared, excluded
+                spec = match.group("spec")
+                try:
+                    if expected is not None and SpecifierSet(spec) != expected:
+                        return match.group(0)
+                except InvalidSpecifier:
+                    # Not a requirement, e.g. other text quoted in pyproject.toml
+                    return match.group(0)
+                    
+                updated_spec, count = version_clause.subn(
+                    lambda clause: clause.group(1) + clause.group(2) + target_version, spec, count=1
+                )
+                if not count:
+                    return match.group(0)
+                declared += 1
+                
+                # Other clauses, such as an upper bound, may rule the target out
+                if not SpecifierSet(updated_spec).contains(target_version, prereleases=True):
+                    excluded += 1
+                    return match.group(0)
+                return match.group("head") + updated_spec
+                
+            updated_content = _pip_requirement_pattern(dependency_name, in_pyproject).sub(rewrite, content)
+            
+            if excluded:
+                print(f"Error updating pip dependency: {dependency_name} in {source or 'requirements.txt'} excludes {target_version}")
+                return False
                 
-            updated_lines = []
-            found = False
-            
-            for line in lines:
-                if line.strip().startswith(f"{dependency_name}=="):
-                    updated_lines.append(f"{dependency_name}=={target_version}\n")
-                    found = True
-                else:
-                    updated_lines.append(line)
-            
-            if not found:
-                updated_lines.append(f"{dependency_name}=={target_version}\n")
+            if not declared:
+                if source is not None or in_pyproject:
+                    print(f"Error updating pip dependency: no {dependency_name} {current_version} declaration in {source}")
+                    return False
+                    
+                if updated_content and not updated_content.endswith("\n"):
+                    updated_content += "\n"
+                updated_content += f"{dependency_name}=={target_version}\n"
                 
-            with open(requirements_path, 'w') as f:
-                f.writelines(updated_lines)
+            # Leave the file untouched when the pin is already current
+            if updated_content != content:
+                _replace_file(requirements_path, updated_content)
                 
             return True
         except Exception as e:
@@ -152,22 +355,146 @@ class PRCreator:
             # Parse groupId and artifactId
             group_id, artifact_id = dependency_name.split(":")
             
-            with open(pom_path, 'r') as f:
+            with open(pom_path, 'rb') as f:
                 content = f.read()
                 
-            # Find and replace the version in the dependency section
-            pattern = f"<dependency>\\s*<groupId>{group_id}</groupId>\\s*<artifactId>{artifact_id}</artifactId>\\s*<version>[^<]+</version>"
-            replacement = f"<dependency>\n        <groupId>{group_id}</groupId>\n        <artifactId>{artifact_id}</artifactId>\n        <version>{target_version}</version>"
-            
-            updated_content = re.sub(pattern, replacement, content)
-            
-            with open(pom_path, 'w') as f:
-                f.write(updated_content)
+            try:
+                versions = self._find_pom_dependency_versions(content, group_id, artifact_id)
+            except expat.ExpatError as e:
+                print(f"Error parsing pom.xml, falling back to pattern matching: {e}")
+                return self._update_maven_dependency_text(pom_path, group_id, artifact_id, target_version)
+                
+            # Splice the new version into the original bytes, so comments, the XML
+            # declaration and formatting elsewhere in the file are left exactly as they were
+            updated_content = content
+            for (start, end), current_version in sorted(versions.items(), reverse=True):
+                if current_version == target_version:
+                    continue
+                raw = content[start:end]
+                text_start = start + len(raw) - len(raw.lstrip())
+                if raw.strip() != current_version.encode('utf-8'):
+                    # Entities, CDATA or comments inside the element; leave it to the text update
+                    return self._update_maven_dependency_text(pom_path, group_id, artifact_id, target_version)
+                updated_content = (updated_content[:text_start] + target_version.encode('utf-8') +
+                                   updated_content[text_start + len(raw.strip()):])
+                
+            if updated_content != content:
+                _replace_file(pom_path, updated_content)
                 
             return True
         except Exception as e:
             print(f"Error updating Maven dependency: {e}")
             return False
+            
+    def _find_pom_dependency_versions(self,
+                                      content: bytes,
+                                      group_id: str,
+                                      artifact_id: str) -> Dict[Tuple[int, int], str]:
+        """
+        Locate the version text of a dependency in a pom.xml
+        
+        Matches the dependency in <dependencies> and <dependencyManagement>
+        regardless of child order. A version given as a ${property} reference
+        is located in <properties> instead, so every dependency sharing it moves
+        together.
+        
+        Args:
+            content: Raw pom.xml content
+            group_id: Maven groupId
+            artifact_id: Maven artifactId
+            
+        Returns:
+            Dict[Tuple[int, int], str]: Current version keyed by the byte span of the element content holding it
+            
+        Raises:
+            expat.ExpatError: If the pom.xml is not well-formed
+        """
+        parser = expat.ParserCreate()
+        # Open elements as (local name, content start offset, character data)
+        stack: List[Tuple[str, int, List[str]]] = []
+        dependencies: List[Dict[str, Tuple[str, Tuple[int, int]]]] = []
+        properties: Dict[str, Tuple[str, Tuple[int, int]]] = {}
+        
+        def start_element(name, attributes):
+            # Tags may carry a namespace prefix
+            local_name = name.rpartition(":")[2]
+            content_start = content.index(b">", parser.CurrentByteIndex) + 1
+            stack.append((local_name, content_start, []))
+            if local_name == "dependency":
+                dependencies.append({})
+                
+        def end_element(name):
+            local_name, content_start, text = stack.pop()
+            # Self-closing elements have no content to replace
+            span = (content_start, max(content_start, parser.CurrentByteIndex))
+            parent = stack[-1][0] if stack else None
+            value = ("".join(text).strip(), span)
+            
+            if parent == "dependency" and dependencies and local_name in ("groupId", "artifactId", "version"):
+                dependencies[-1][local_name] = value
+            elif parent == "properties" and len(stack) == 2:
+                properties[local_name] = value
+                
+        def character_data(data):
+            if stack:
+                stack[-1][2].append(data)
+                
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        parser.CharacterDataHandler = character_data
+        parser.Parse(content, True)
+        
+        versions = {}
+        for dependency in dependencies:
+            if dependency.get("groupId", ("",))[0] != group_id or \
+               dependency.get("artifactId", ("",))[0] != artifact_id:
+                continue
+                
+            if "version" not in dependency:
+                # Version comes from <dependencyManagement> or a parent POM
+                continue
+                
+            current_version, span = dependency["version"]
+            match = _MAVEN_PROPERTY_REF_RE.match(current_version)
+            if match:
+                if match.group(1) not in properties:
+                    continue
+                current_version, span = properties[match.group(1)]
+                
+            if current_version:
+                versions[span] = current_version
+            
+        return versions
+        
+    def _update_maven_dependency_text(self,
+                                      pom_path: str,
+                                      group_id: str,
+                                      artifact_id: str,
+                                      target_version: str) -> bool:
+        """
+        Update a Maven dependency by pattern matching, for poms that are not well-formed XML
+        
+        Args:
+            pom_path: Path to the pom.xml
+            group_id: Maven groupId
+            artifact_id: Maven artifactId
+            target_version: Target version
+            
+        Returns:
+            bool: True if the update was successful
+        """
+        with open(pom_path, 'r') as f:
+            content = f.read()
+            
+        # Find and replace the version in the dependency section
+        replacement = f"<dependency>\n        <groupId>{group_id}</groupId>\n        <artifactId>{artifact_id}</artifactId>\n        <version>{target_version}</version>"
+        
+        updated_content = _maven_dependency_pattern(group_id, artifact_id).sub(lambda match: replacement, content)
+        
+        if updated_content != content:
+            _replace_file(pom_path, updated_content)
+            
+        return True
     
     def _update_gradle_dependency(self, dependency_name: str, target_version: str) -> bool:
         """
@@ -195,13 +522,13 @@ class PRCreator:
                 content = f.read()
                 
             # Find and replace the version in the dependency section
-            pattern = f"implementation ['\"]({group_id}:{artifact_id}:)[^'\"]+['\"]"
-            replacement = f"implementation '$1{target_version}'"
-            
-            updated_content = re.sub(pattern, replacement, content)
+            updated_content = _gradle_dependency_pattern(group_id, artifact_id).sub(
+                lambda match: f"implementation '{match.group(1)}{target_version}'",
+                content
+            )
             
-            with open(gradle_path, 'w') as f:
-                f.write(updated_content)
+            if updated_content != content:
+                _replace_file(gradle_path, updated_content)
                 
             return True
         except Exception as e:
@@ -220,7 +547,7 @@ class PRCreator:
             str: Name of the created branch
         """
         try:
-            repo = Repo(self.repo_path)
+            repo = self._repo
             
             # Create a branch name
             normalized_name = dependency_name.replace('@', '').replace('/', '-').replace(':', '-')
@@ -239,6 +566,64 @@ class PRCreator:
             print(f"Error creating branch: {e}")
             return ""
     
+    def current_ref(self) -> str:
+        """
+        Get what is currently checked out
+        
+        Returns:
+            str: Branch name, or the commit SHA on a detached HEAD ("" if it could not be read)
+        """
+        try:
+            repo = self._repo
+            if repo.head.is_detached:
+                return repo.head.commit.hexsha
+            return repo.active_branch.name
+        except Exception as e:
+            print(f"Error reading current branch: {e}")
+            return ""
+    
+    def changed_files(self) -> List[str]:
+        """
+        List the files with uncommitted changes
+        
+        Returns:
+            List[str]: Repository-relative paths of modified and untracked files
+        """
+        try:
+            repo = self._repo
+            return repo.git.diff('HEAD', name_only=True).splitlines() + repo.untracked_files
+        except Exception as e:
+            print(f"Error listing changed files: {e}")
+            return []
+    
+    def restore_branch(self, start_ref: str, changed_files: List[str]) -> bool:
+        """
+        Undo create_branch and update_dependency
+        
+        Args:
+            start_ref: What current_ref returned before the branch was created
+            changed_files: Paths changed by update_dependency
+            
+        Returns:
+            bool: True if the files were restored and start_ref checked out
+        """
+        try:
+            repo = self._repo
+            
+            untracked = set(repo.untracked_files)
+            tracked = [path for path in changed_files if path not in untracked]
+            if tracked:
+                repo.git.checkout('HEAD', '--', *tracked)
+            for path in changed_files:
+                if path in untracked:
+                    os.remove(os.path.join(self.repo_path, path))
+                    
+            repo.git.checkout(start_ref)
+            return True
+        except Exception as e:
+            print(f"Error restoring branch: {e}")
+            return False
+    
     def commit_changes(self, dependency_name: str, current_version: str, target_version: str) -> bool:
         """
         Commit the dependency upgrade changes
@@ -252,7 +637,7 @@ class PRCreator:
             bool: True if the commit was successful
         """
         try:
-            repo = Repo(self.repo_path)
+            repo = self._repo
             
             # Check if there are changes to commit
             if not repo.is_dirty():
@@ -284,7 +669,7 @@ class PRCreator:
             bool: True if the push was successful
         """
         try:
-            repo = Repo(self.repo_path)
+            repo = self._repo
             
             # Get the remote
             origin = repo.remote('origin')
@@ -317,36 +702,21 @@ class PRCreator:
             Dict: Pull request details
         """
         try:
-            repo = Repo(self.repo_path)
-            
-            # Get the remote URL
-            remote_url = repo.remote('origin').url
-            
-            # Extract owner and repo name from the URL
-            # Assuming a GitHub URL like https://github.com/owner/repo.git
-            # or git@github.com:owner/repo.git
-            if remote_url.startswith('https://'):
-                match = re.match(r'https://github.com/([^/]+)/([^/\.]+)', remote_url)
-                if match:
-                    owner, repo_name = match.groups()
-                else:
-                    return {"success": False, "error": "Could not parse GitHub URL"}
-            else:
-                match = re.match(r'git@github.com:([^/]+)/([^/\.]+)', remote_url)
-                if match:
-                    owner, repo_name = match.groups()
-                else:
-                    return {"success": False, "error": "Could not parse GitHub URL"}
-            
+            coordinates = self._github_coordinates
+            if coordinates is None:
+                return {"success": False, "error": "Could not parse GitHub URL"}
+            owner, repo_name = coordinates
+            
+            # A retried run may already have opened the PR for this branch
+            existing_pr = self._find_open_pull_request(owner, repo_name, branch_name)
+            if existing_pr:
+                return existing_pr
+                
             # Create PR title
             pr_title = f"Upgrade {dependency_name} from {current_version} to {target_version}"
             
             # Create PR using GitHub API
             url = f"https://api.github.com/repos/{owner}/{repo_name}/pulls"
-            headers = {
-                "Authorization": f"token {self.github_token}",
-                "Accept": "application/vnd.github.v3+json"
-            }
             data = {
                 "title": pr_title,
                 "body": pr_description,
@@ -354,10 +724,12 @@ class PRCreator:
                 "base": "main"  # Assuming the main branch is 'main'
             }
             
-            response = requests.post(url, headers=headers, json=data)
+            response = self.session.post(url, json=data)
             
             if response.status_code in [200, 201]:
                 pr_data = response.json()
+                # The cached listing for this branch no longer reflects GitHub
+                self._pr_listing_cache.pop(branch_name, None)
                 return {
                     "success": True,
                     "pr_number": pr_data["number"],
@@ -372,3 +744,48 @@ class PRCreator:
         except Exception as e:
             print(f"Error creating pull request: {e}")
             return {"success": False, "error": str(e)}
+            
+    def _find_open_pull_request(self, owner: str, repo_name: str, branch_name: str) -> Optional[Dict]:
+        """
+        Look up an open pull request for a branch
+        
+        The listing is requested with the ETag of the previous lookup, so an
+        unchanged listing costs a 304 that doesn't count against the rate limit.
+        
+        Args:
+            owner: Repository owner
+            repo_name: Repository name
+            branch_name: Head branch of the pull request
+            
+        Returns:
+            Optional[Dict]: Pull request details, or None if there is no open PR or the lookup failed
+        """
+        url = f"https://api.github.com/repos/{owner}/{repo_name}/pulls"
+        cached = self._pr_listing_cache.get(branch_name)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        
+        try:
+            response = self.session.get(
+                url,
+                params={"head": f"{owner}:{branch_name}", "state": "open"},
+                headers=headers
+            )
+        except requests.RequestException as e:
+            print(f"Error listing pull requests: {e}")
+            return None
+            
+        if response.status_code == 304 and cached:
+            return cached[1]
+        if response.status_code != 200:
+            return None
+            
+        pulls = response.json()
+        pr = None
+        if pulls:
+            pr = {"success": True, "pr_number": pulls[0]["number"], "pr_url": pulls[0]["html_url"]}
+            
+        etag = response.headers.get("ETag")
+        if etag:
+            self._pr_listing_cache[branch_name] = (etag, pr)
+            
+        return pr
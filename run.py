@@ -2,7 +2,7 @@
 import os
 import argparse
 from dotenv import load_dotenv
-from main import AutomatedUpgradeWorkflow
+from main import AutomatedUpgradeWorkflow, DEFAULT_CONCURRENCY
 
 # Load environment variables
 load_dotenv()
@@ -14,6 +14,9 @@ def main():
     parser.add_argument("--min-severity", default="medium", choices=["low", "medium", "high", "critical"], help="Minimum vulnerability severity to consider")
     parser.add_argument("--use-claude", action="store_true", default=True, help="Use Claude AI (default: True)")
     parser.add_argument("--use-openai", action="store_false", dest="use_claude", help="Use OpenAI instead of Claude")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help=f"Maximum number of independent steps (AI calls, branch and manifest update) run at once (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--batch", action="store_true", help="Send AI requests through the provider's batch API (half price, can take up to 24 hours per request)")
+    parser.add_argument("--cache", action="store_true", help="Reuse AI responses from earlier runs (cached on disk for 7 days)")
     
     args = parser.parse_args()
     
@@ -28,7 +31,7 @@ def main():
     
     print("\n" + "="*80 + "\n")
     
-    workflow = AutomatedUpgradeWorkflow(args.repo, args.use_claude)
+    workflow = AutomatedUpgradeWorkflow(args.repo, args.use_claude, args.concurrency, args.batch, args.cache)
     result = workflow.run(args.dependency, args.min_severity)
     
     print("\n" + "="*80 + "\n")
@@ -2,10 +2,307 @@
 import os
 import re
 import json
+import shutil
+import mmap
+import functools
+import threading
 import subprocess
-from typing import Dict, List, Optional, Tuple
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 import pytest
 
+try:
+    import ahocorasick
+except ImportError:
+    # pyahocorasick is an optional accelerator; fall back to one substring search per name
+    ahocorasick = None
+
+try:
+    import orjson
+except ImportError:
+    # orjson is an optional accelerator; fall back to the standard library
+    orjson = None
+
+# Both parsers accept bytes, so manifests can be read in binary mode
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Lines of each test run stream kept for the results; long suites can print far more
+TEST_OUTPUT_TAIL_LINES = 5000
+
+# Bytes read at a time when scanning a manifest for a framework name
+_MANIFEST_CHUNK_SIZE = 64 * 1024
+
+# Below this many test files, scanning serially is faster than starting a pool
+_PARALLEL_SCAN_MIN_FILES = 64
+
+# Directories generated tests go to, in order of preference; the first is created if none exist
+_TEST_DIRS_BY_FRAMEWORK = {
+    "jest": ("__tests__", "test", "tests"),
+    "pytest": ("tests", "test"),
+    "junit": ("src/test/java", "test"),
+}
+_DEFAULT_TEST_DIRS = ("tests", "test")
+
+# Test case declarations recognized by _extract_test_cases
+_JS_TEST_RE = re.compile(r"\b(describe|it)\(['\"]([^'\"]+)['\"]")
+_PYTEST_TEST_RE = re.compile(r"def\s+(test_[a-zA-Z0-9_]+)\s*\(")
+_JUNIT_TEST_RE = re.compile(r"@Test\s+[public\s]+void\s+([a-zA-Z0-9_]+)\s*\(")
+
+# Heuristic for the function or method called in a usage's context line
+_FUNCTION_CALL_RE = re.compile(r'\.([a-zA-Z0-9_]+)\(')
+
+# Words of a dependency name, joined into a Java class name
+_ALNUM_RE = re.compile(r'[a-zA-Z0-9]+')
+
+# Templates for the tests generated per framework, filled by _generate_tests
+# with str.format_map. "fields" derives the names used from the dependency
+# name; "function" is filled once per called function and "breaking_change"
+# once per change.
+_TEST_TEMPLATES = {
+    "jest": {
+        "fields": lambda dependency_name: {
+            "dependency_name": dependency_name,
+            "normalized_name": dependency_name.replace('-', '').replace('@', '').replace('/', ''),
+        },
+        "file": "{normalized_name}.test.js",
+        "name": "validate_{normalized_name}_upgrade",
+        "header": """
+import {normalized_name} from '{dependency_name}';
+
+describe('{dependency_name} upgrade validation', () => {{
+    test('should import the dependency correctly', () => {{
+        expect({normalized_name}).toBeDefined();
+    }});
+        """,
+        "function_test_name": "validate_{function_name}_availability",
+        "function": """
+    test('{function_name} function should be available', () => {{
+        expect({normalized_name}.{function_name}).toBeDefined();
+        // Add more specific assertions based on expected behavior
+    }});
+                """,
+        "breaking_change": """
+    test('should handle breaking change: {change_description}', () => {{
+        // Add assertions to verify the breaking change is handled correctly
+    }});
+            """,
+        "footer": "\n});",
+    },
+    "pytest": {
+        "fields": lambda dependency_name: {
+            "dependency_name": dependency_name,
+            "normalized_name": dependency_name.replace('-', '_').replace('.', '_').lower(),
+        },
+        "file": "test_{normalized_name}.py",
+        "name": "test_{normalized_name}_upgrade",
+        "header": """
+import pytest
+import {normalized_name}
+
+def test_{normalized_name}_import():
+    \"\"\"Test that the dependency can be imported correctly.\"\"\"
+    assert {normalized_name} is not None
+        """,
+        "function_test_name": "test_{normalized_name}_{function_name}_availability",
+        "function": """
+
+def test_{normalized_name}_{function_name}_availability():
+    \"\"\"Test that the {function_name} function is available.\"\"\"
+    assert hasattr({normalized_name}, '{function_name}')
+    # Add more specific assertions based on expected behavior
+                """,
+        "breaking_change": """
+
+def test_{normalized_name}_breaking_change_{index}():
+    \"\"\"Test that breaking change is handled: {change_description}\"\"\"
+    # Add assertions to verify the breaking change is handled correctly
+    pass
+            """,
+        "footer": "",
+    },
+    "junit": {
+        "fields": lambda dependency_name: {
+            "dependency_name": dependency_name,
+            # Dependency name converted to a Java class name
+            "class_name": "".join(word.capitalize() for word in _ALNUM_RE.findall(dependency_name)),
+        },
+        "file": "{class_name}UpgradeTest.java",
+        "name": "test{class_name}Upgrade",
+        "header": """
+import org.junit.Test;
+import static org.junit.Assert.*;
+
+public class {class_name}UpgradeTest {{
+    
+    @Test
+    public void testDependencyAvailability() {{
+        // Test that the dependency can be used
+        // Add assertions based on expected behavior
+    }}
+        """,
+        "function_test_name": "test{capitalized_function_name}Method",
+        "function": """
+    
+    @Test
+    public void test{capitalized_function_name}Method() {{
+        // Test that the {function_name} method works correctly
+        // Add assertions based on expected behavior
+    }}
+                """,
+        "breaking_change": """
+    
+    @Test
+    public void testBreakingChange{index}() {{
+        // Test that breaking change is handled: {change_description}
+        // Add assertions to verify the breaking change is handled correctly
+    }}
+            """,
+        "footer": "\n}",
+    },
+}
+
+def _iter_files(directory: str) -> Iterator[os.DirEntry]:
+    """
+    Yield the files under a directory, recursively
+    
+    os.scandir reports entry types from the directory listing itself, so
+    unlike os.walk no extra stat is needed to tell files from directories.
+    
+    Args:
+        directory: Directory to walk
+        
+    Returns:
+        Iterator[os.DirEntry]: Entries of the files found
+    """
+    pending = [directory]
+    
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file():
+                        yield entry
+        except OSError:
+            continue
+
+def _read_if_contains(file_path: str, needle: re.Pattern) -> Optional[str]:
+    """
+    Read a file only if its raw bytes match a pattern
+    
+    The file is searched through mmap first, so files that don't mention the
+    needle are never copied into memory or decoded.
+    
+    Args:
+        file_path: Path to the file
+        needle: Compiled bytes pattern to look for
+        
+    Returns:
+        Optional[str]: The decoded content, or None if there is no match or the file can't be read
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                if needle.search(content) is None:
+                    return None
+                return content[:].decode('utf-8', errors='ignore')
+    except (OSError, ValueError):
+        # ValueError: empty files can't be mapped
+        return None
+
+def _file_contains(file_path: str, needles: List[bytes], case_insensitive: bool = False) -> Optional[bytes]:
+    """
+    Find the first of some byte strings that occurs in a file
+    
+    The file is read in fixed-size chunks and the scan stops at the first hit,
+    so large manifests are never held in memory (or lowercased) as a whole.
+    
+    Args:
+        file_path: Path to the file
+        needles: Byte strings to look for (lowercase when case_insensitive)
+        case_insensitive: If True, match regardless of ASCII case
+        
+    Returns:
+        Optional[bytes]: The needle found, or None if none occurs or the file can't be read
+    """
+    # Carried over between chunks so needles split across a boundary are found
+    overlap = max(map(len, needles), default=1) - 1
+    tail = b""
+    
+    try:
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = f.read(_MANIFEST_CHUNK_SIZE)
+                if not chunk:
+                    return None
+                if case_insensitive:
+                    chunk = chunk.lower()
+                window = tail + chunk
+                for needle in needles:
+                    if needle in window:
+                        return needle
+                tail = window[-overlap:] if overlap else b""
+    except OSError:
+        return None
+
+def _name_finder(names: Tuple[str, ...]) -> Callable[[str], Set[str]]:
+    """
+    Build a finder reporting which names occur in a lowercased text
+    
+    All names are searched in a single pass with an Aho-Corasick automaton when
+    pyahocorasick is installed, otherwise with one substring search per name.
+    
+    Args:
+        names: Lowercased names to look for
+        
+    Returns:
+        Callable[[str], Set[str]]: Function returning the names present in a text
+    """
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for name in names:
+            automaton.add_word(name, name)
+        automaton.make_automaton()
+        return lambda text: {name for _, name in automaton.iter(text)}
+        
+    return lambda text: {name for name in names if name in text}
+
+def _run_command(command: List[str], cwd: str) -> Tuple[int, str, str]:
+    """
+    Run a command, keeping only the tail of its output
+    
+    stdout and stderr are consumed line by line as the command runs (stderr on a
+    helper thread so neither pipe can fill up and block it), and only the last
+    TEST_OUTPUT_TAIL_LINES lines of each are held in memory.
+    
+    Args:
+        command: Command and arguments
+        cwd: Working directory
+        
+    Returns:
+        Tuple[int, str, str]: Exit code and the tails of stdout and stderr
+    """
+    with subprocess.Popen(
+        command,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+        bufsize=1
+    ) as process:
+        stderr_tail = collections.deque(maxlen=TEST_OUTPUT_TAIL_LINES)
+        stderr_reader = threading.Thread(target=stderr_tail.extend, args=(process.stderr,), daemon=True)
+        stderr_reader.start()
+        
+        stdout_tail = collections.deque(process.stdout, maxlen=TEST_OUTPUT_TAIL_LINES)
+        stderr_reader.join()
+        returncode = process.wait()
+        
+    return returncode, "".join(stdout_tail), "".join(stderr_tail)
+
 class TestGenerator:
     def __init__(self, repo_path: str):
         """
@@ -16,9 +313,16 @@ class TestGenerator:
         """
         self.repo_path = repo_path
         
-    def detect_test_framework(self) -> str:
+        # Test cases extracted per file, keyed by (path, mtime_ns, size) so edited files are rescanned
+        self._test_case_cache: Dict[Tuple[str, int, int], List[Dict]] = {}
+        
+    @functools.cached_property
+    def test_framework(self) -> str:
         """
-        Detect the testing framework used in the project
+        Testing framework used in the project, detected from its manifests
+        
+        The manifests are read once and the result kept, since every step of
+        an upgrade asks for the framework and the answer doesn't change.
         
         Returns:
             str: Test framework (jest, pytest, junit, etc.)
@@ -26,39 +330,81 @@ class TestGenerator:
         # Check for Jest (JavaScript/TypeScript)
         package_json_path = os.path.join(self.repo_path, "package.json")
         if os.path.exists(package_json_path):
-            with open(package_json_path, 'r') as f:
+            with open(package_json_path, 'rb') as f:
                 try:
-                    data = json.load(f)
-                    
-                    # Check dependencies and devDependencies
-                    deps = data.get("dependencies", {})
-                    dev_deps = data.get("devDependencies", {})
+                    data = _json_loads(f.read())
+                except ValueError:
+                    # Not valid JSON (or not UTF-8); decode errors subclass ValueError
+                    data = None
                     
+            if isinstance(data, dict):
+                # Check dependencies and devDependencies
+                deps = data.get("dependencies") or {}
+                dev_deps = data.get("devDependencies") or {}
+                
+                if isinstance(deps, dict) and isinstance(dev_deps, dict):
                     if "jest" in dev_deps or "jest" in deps:
                         return "jest"
                     elif "mocha" in dev_deps or "mocha" in deps:
                         return "mocha"
-                except:
-                    pass
         
         # Check for pytest (Python)
         requirements_path = os.path.join(self.repo_path, "requirements.txt")
         if os.path.exists(requirements_path):
-            with open(requirements_path, 'r') as f:
-                content = f.read()
-                if "pytest" in content:
-                    return "pytest"
+            if _file_contains(requirements_path, [b"pytest"]):
+                return "pytest"
         
         # Check for JUnit (Java)
         pom_path = os.path.join(self.repo_path, "pom.xml")
         if os.path.exists(pom_path):
-            with open(pom_path, 'r') as f:
-                content = f.read()
-                if "junit" in content.lower():
-                    return "junit"
+            if _file_contains(pom_path, [b"junit"], case_insensitive=True):
+                return "junit"
         
         # Default to generic
         return "generic"
+        
+    @functools.cached_property
+    def _root_dirs(self) -> Set[str]:
+        """
+        Names of the directories directly under the repository root
+        
+        Candidate test directories are checked against this one listing instead
+        of probing each path with its own stat calls.
+        
+        Returns:
+            Set[str]: Directory names (empty if the root can't be listed)
+        """
+        try:
+            with os.scandir(self.repo_path) as entries:
+                return {entry.name for entry in entries if entry.is_dir()}
+        except OSError:
+            return set()
+            
+    def _has_dir(self, relative_path: str) -> bool:
+        """
+        Check whether a directory exists in the repository
+        
+        Args:
+            relative_path: '/'-separated path relative to the repository root
+            
+        Returns:
+            bool: True if the directory exists
+        """
+        top, _, rest = relative_path.partition("/")
+        if top not in self._root_dirs:
+            return False
+            
+        # Nested candidates like src/test still need their own check, once the top level is known
+        return not rest or os.path.isdir(os.path.join(self.repo_path, relative_path))
+        
+    def detect_test_framework(self) -> str:
+        """
+        Detect the testing framework used in the project
+        
+        Returns:
+            str: Test framework (jest, pytest, junit, etc.)
+        """
+        return self.test_framework
     
     def find_existing_tests(self, dependency_name: str) -> List[Dict]:
         """
@@ -70,48 +416,93 @@ class TestGenerator:
         Returns:
             List[Dict]: List of existing tests
         """
+        return self.find_existing_tests_bulk([dependency_name])[dependency_name]
+        
+    def find_existing_tests_bulk(self, dependency_names: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Find existing tests related to each of several dependencies, walking the test directories once
+        
+        Results are the same as calling find_existing_tests per dependency. Each
+        test file is searched for all names together and its test cases are
+        extracted at most once, and until the file changes, not again on later
+        calls.
+        
+        Args:
+            dependency_names: Names of the dependencies
+            
+        Returns:
+            Dict[str, List[Dict]]: Existing tests keyed by dependency name
+        """
         test_framework = self.detect_test_framework()
         
-        # Normalize dependency name
-        normalized_name = dependency_name.lower().replace('-', '_')
+        results = {dependency_name: [] for dependency_name in dependency_names}
+        
+        # Normalize dependency names; several can share a normalized form
+        by_normalized_name: Dict[str, List[str]] = {}
+        for dependency_name in results:
+            by_normalized_name.setdefault(dependency_name.lower().replace('-', '_'), []).append(dependency_name)
+            
+        if not by_normalized_name:
+            return results
+            
+        normalized_names = tuple(by_normalized_name)
+        find_names = _name_finder(normalized_names)
         
-        results = []
+        # Matched case-insensitively against raw bytes, like the lowercased text was
+        needle = re.compile(b"|".join(re.escape(name.encode('utf-8')) for name in normalized_names), re.IGNORECASE)
         
         # Define test directories based on common conventions
         test_dirs = ["test", "tests", "src/test", "__tests__", "spec"]
         
-        for test_dir in test_dirs:
-            test_path = os.path.join(self.repo_path, test_dir)
+        # Skip non-test files
+        test_files = [
+            entry
+            for test_dir in test_dirs if self._has_dir(test_dir)
+            for entry in _iter_files(os.path.join(self.repo_path, test_dir))
+            if self._is_test_file(entry.name, test_framework)
+        ]
+        
+        def scan(entry: os.DirEntry) -> Optional[Tuple[str, List[Dict], Set[str]]]:
+            try:
+                stat = entry.stat()
+            except OSError:
+                return None
+                
+            # Files already known to hold no test cases aren't read again
+            key = (entry.path, stat.st_mtime_ns, stat.st_size)
+            test_cases = self._test_case_cache.get(key)
+            if test_cases == []:
+                return None
+                
+            # Check if the file contains references to any of the dependencies
+            content = _read_if_contains(entry.path, needle)
+            if content is None:
+                return None
+                
+            # Extract test cases
+            if test_cases is None:
+                test_cases = self._extract_test_cases(content, test_framework)
+                self._test_case_cache[key] = test_cases
+            if not test_cases:
+                return None
+                
+            return entry.path, test_cases, find_names(content.lower())
             
-            if not os.path.exists(test_path) or not os.path.isdir(test_path):
-                continue
+        # Reads and the mmap search release the GIL, so threads overlap the file I/O
+        if len(test_files) < _PARALLEL_SCAN_MIN_FILES:
+            scanned = [scan(entry) for entry in test_files]
+        else:
+            with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+                scanned = list(executor.map(scan, test_files))
                 
-            for root, _, files in os.walk(test_path):
-                for file in files:
-                    # Skip non-test files
-                    if not self._is_test_file(file, test_framework):
-                        continue
-                        
-                    file_path = os.path.join(root, file)
-                    relative_path = os.path.relpath(file_path, self.repo_path)
-                    
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        try:
-                            content = f.read()
-                            
-                            # Check if the file contains references to the dependency
-                            if normalized_name in content.lower():
-                                # Extract test cases
-                                test_cases = self._extract_test_cases(content, test_framework)
-                                
-                                if test_cases:
-                                    results.append({
-                                        "file": relative_path,
-                                        "test_cases": test_cases
-                                    })
-                        except:
-                            # Skip files that can't be read
-                            pass
+        for file_path, test_cases, found_names in filter(None, scanned):
+            relative_path = os.path.relpath(file_path, self.repo_path)
+            for normalized_name in found_names:
+                for dependency_name in by_normalized_name[normalized_name]:
+                    results[dependency_name].append({
+                        "file": relative_path,
+                        "test_cases": test_cases
+                    })
         
         return results
     
@@ -136,7 +527,8 @@ class TestGenerator:
             return filename.endswith("Test.java")
         else:
             # Generic test file detection
-            return "test" in filename.lower() or "spec" in filename.lower()
+            lowered = filename.lower()
+            return "test" in lowered or "spec" in lowered
     
     def _extract_test_cases(self, content: str, framework: str) -> List[Dict]:
         """
@@ -154,28 +546,24 @@ class TestGenerator:
         if framework == "jest" or framework == "mocha":
             # Extract Jest/Mocha test cases
             # Look for patterns like describe('...', () => { ... }) and it('...', () => { ... })
-            describe_pattern = r"describe\(['\"]([^'\"]+)['\"]"
-            it_pattern = r"it\(['\"]([^'\"]+)['\"]"
+            # One pass in source order; each it() belongs to the describe() opened before it
+            describe_name = None
             
-            # Find describe blocks
-            for match in re.finditer(describe_pattern, content):
-                describe_name = match.group(1)
+            for match in _JS_TEST_RE.finditer(content):
+                keyword, name = match.groups()
                 
-                # Find it blocks (individual tests)
-                for it_match in re.finditer(it_pattern, content):
-                    test_name = it_match.group(1)
-                    
+                if keyword == "describe":
+                    describe_name = name
+                elif describe_name is not None:
                     test_cases.append({
-                        "name": f"{describe_name} - {test_name}",
+                        "name": f"{describe_name} - {name}",
                         "type": "unit"
                     })
                     
         elif framework == "pytest":
             # Extract pytest test cases
             # Look for functions starting with test_
-            test_pattern = r"def\s+(test_[a-zA-Z0-9_]+)\s*\("
-            
-            for match in re.finditer(test_pattern, content):
+            for match in _PYTEST_TEST_RE.finditer(content):
                 test_name = match.group(1)
                 
                 test_cases.append({
@@ -186,9 +574,7 @@ class TestGenerator:
         elif framework == "junit":
             # Extract JUnit test cases
             # Look for methods annotated with @Test
-            test_pattern = r"@Test\s+[public\s]+void\s+([a-zA-Z0-9_]+)\s*\("
-            
-            for match in re.finditer(test_pattern, content):
+            for match in _JUNIT_TEST_RE.finditer(content):
                 test_name = match.group(1)
                 
                 test_cases.append({
@@ -219,17 +605,7 @@ class TestGenerator:
         existing_tests = self.find_existing_tests(dependency_name)
         
         # Generate new tests based on API usage and breaking changes
-        generated_tests = []
-        
-        if test_framework == "jest":
-            generated_tests = self._generate_jest_tests(dependency_name, api_usage, breaking_changes)
-        elif test_framework == "pytest":
-            generated_tests = self._generate_pytest_tests(dependency_name, api_usage, breaking_changes)
-        elif test_framework == "junit":
-            generated_tests = self._generate_junit_tests(dependency_name, api_usage, breaking_changes)
-        else:
-            # Generic test generation
-            generated_tests = self._generate_generic_tests(dependency_name, api_usage, breaking_changes)
+        generated_tests = self._generate_tests(dependency_name, api_usage, breaking_changes, test_framework)
         
         return {
             "existing_tests": existing_tests,
@@ -237,303 +613,119 @@ class TestGenerator:
             "framework": test_framework
         }
     
-    def _generate_jest_tests(self, 
-                           dependency_name: str, 
-                           api_usage: List[Dict],
-                           breaking_changes: List[Dict]) -> List[Dict]:
-        """
-        Generate Jest tests for a dependency upgrade
-        
-        Args:
-            dependency_name: Name of the dependency
-            api_usage: List of API usage examples
-            breaking_changes: List of breaking changes
-            
-        Returns:
-            List[Dict]: Generated Jest tests
-        """
-        tests = []
-        
-        # Normalize dependency name for use in variable names
-        normalized_name = dependency_name.replace('-', '').replace('@', '').replace('/', '')
-        
-        # Create a basic test file
-        test_content = f"""
-import {normalized_name} from '{dependency_name}';
-
-describe('{dependency_name} upgrade validation', () => {{
-    test('should import the dependency correctly', () => {{
-        expect({normalized_name}).toBeDefined();
-    }});
+    def _generate_tests(self, 
+                        dependency_name: str, 
+                        api_usage: List[Dict],
+                        breaking_changes: List[Dict],
+                        framework: str) -> List[Dict]:
         """
+        Generate tests for a dependency upgrade from the framework's templates
         
-        # Add tests for each API usage
-        for i, usage in enumerate(api_usage):
-            # Extract the function or method being used
-            context = usage.get("context", "")
-            
-            # Simple heuristic to extract function names
-            function_match = re.search(r'\.([a-zA-Z0-9_]+)\(', context)
-            
-            if function_match:
-                function_name = function_match.group(1)
-                
-                test_content += f"""
-    test('{function_name} function should be available', () => {{
-        expect({normalized_name}.{function_name}).toBeDefined();
-        // Add more specific assertions based on expected behavior
-    }});
-                """
-                
-                tests.append({
-                    "name": f"validate_{function_name}_availability",
-                    "content": test_content,
-                    "file": f"{normalized_name}.test.js"
-                })
-        
-        # Add tests for breaking changes
-        for i, change in enumerate(breaking_changes):
-            change_description = change.get("description", "")
-            
-            test_content += f"""
-    test('should handle breaking change: {change_description}', () => {{
-        // Add assertions to verify the breaking change is handled correctly
-    }});
-            """
-        
-        test_content += "\n});"
-        
-        tests.append({
-            "name": f"validate_{normalized_name}_upgrade",
-            "content": test_content,
-            "file": f"{normalized_name}.test.js"
-        })
-        
-        return tests
-    
-    def _generate_pytest_tests(self, 
-                             dependency_name: str, 
-                             api_usage: List[Dict],
-                             breaking_changes: List[Dict]) -> List[Dict]:
-        """
-        Generate pytest tests for a dependency upgrade
+        The called functions and change descriptions are extracted once, then
+        rendered with the templates of the framework (pytest for frameworks
+        without templates of their own).
         
         Args:
             dependency_name: Name of the dependency
             api_usage: List of API usage examples
             breaking_changes: List of breaking changes
+            framework: Test framework to generate tests for
             
         Returns:
-            List[Dict]: Generated pytest tests
-        """
-        tests = []
-        
-        # Normalize dependency name for use in variable names
-        normalized_name = dependency_name.replace('-', '_').replace('.', '_').lower()
-        
-        # Create a basic test file
-        test_content = f"""
-import pytest
-import {normalized_name}
-
-def test_{normalized_name}_import():
-    \"\"\"Test that the dependency can be imported correctly.\"\"\"
-    assert {normalized_name} is not None
+            List[Dict]: Generated tests, the last one holding the test file content
         """
+        templates = _TEST_TEMPLATES.get(framework, _TEST_TEMPLATES["pytest"])
         
-        # Add tests for each API usage
-        for i, usage in enumerate(api_usage):
-            # Extract the function or method being used
-            context = usage.get("context", "")
-            
-            # Simple heuristic to extract function names
-            function_match = re.search(r'\.([a-zA-Z0-9_]+)\(', context)
-            
-            if function_match:
-                function_name = function_match.group(1)
-                
-                test_content += f"""
-
-def test_{normalized_name}_{function_name}_availability():
-    \"\"\"Test that the {function_name} function is available.\"\"\"
-    assert hasattr({normalized_name}, '{function_name}')
-    # Add more specific assertions based on expected behavior
-                """
-                
-                tests.append({
-                    "name": f"test_{normalized_name}_{function_name}_availability",
-                    "content": test_content,
-                    "file": f"test_{normalized_name}.py"
-                })
-        
-        # Add tests for breaking changes
-        for i, change in enumerate(breaking_changes):
-            change_description = change.get("description", "")
-            
-            test_content += f"""
-
-def test_{normalized_name}_breaking_change_{i}():
-    \"\"\"Test that breaking change is handled: {change_description}\"\"\"
-    # Add assertions to verify the breaking change is handled correctly
-    pass
-            """
-        
-        tests.append({
-            "name": f"test_{normalized_name}_upgrade",
-            "content": test_content,
-            "file": f"test_{normalized_name}.py"
-        })
+        # Simple heuristic to extract the function or method being used
+        function_names = [match.group(1) for match in
+                          (_FUNCTION_CALL_RE.search(usage.get("context", "")) for usage in api_usage)
+                          if match]
+        change_descriptions = [change.get("description", "") for change in breaking_changes]
         
-        return tests
-    
-    def _generate_junit_tests(self, 
-                            dependency_name: str, 
-                            api_usage: List[Dict],
-                            breaking_changes: List[Dict]) -> List[Dict]:
-        """
-        Generate JUnit tests for a dependency upgrade
+        fields = templates["fields"](dependency_name)
+        test_file = templates["file"].format_map(fields)
         
-        Args:
-            dependency_name: Name of the dependency
-            api_usage: List of API usage examples
-            breaking_changes: List of breaking changes
-            
-        Returns:
-            List[Dict]: Generated JUnit tests
-        """
         tests = []
-        
-        # Convert dependency name to Java class name
-        class_name = "".join(word.capitalize() for word in re.findall(r'[a-zA-Z0-9]+', dependency_name))
-        
-        # Create a basic test file
-        test_content = f"""
-import org.junit.Test;
-import static org.junit.Assert.*;
-
-public class {class_name}UpgradeTest {{
-    
-    @Test
-    public void testDependencyAvailability() {{
-        // Test that the dependency can be used
-        // Add assertions based on expected behavior
-    }}
-        """
+        parts = [templates["header"].format_map(fields)]
         
         # Add tests for each API usage
-        for i, usage in enumerate(api_usage):
-            # Extract the function or method being used
-            context = usage.get("context", "")
-            
-            # Simple heuristic to extract method names
-            method_match = re.search(r'\.([a-zA-Z0-9_]+)\(', context)
+        for function_name in function_names:
+            function_fields = dict(fields,
+                                   function_name=function_name,
+                                   capitalized_function_name=function_name.capitalize())
+            parts.append(templates["function"].format_map(function_fields))
             
-            if method_match:
-                method_name = method_match.group(1)
-                
-                test_content += f"""
-    
-    @Test
-    public void test{method_name.capitalize()}Method() {{
-        // Test that the {method_name} method works correctly
-        // Add assertions based on expected behavior
-    }}
-                """
-                
-                tests.append({
-                    "name": f"test{method_name.capitalize()}Method",
-                    "content": test_content,
-                    "file": f"{class_name}UpgradeTest.java"
-                })
+            tests.append({
+                "name": templates["function_test_name"].format_map(function_fields),
+                "file": test_file
+            })
         
         # Add tests for breaking changes
-        for i, change in enumerate(breaking_changes):
-            change_description = change.get("description", "")
-            
-            test_content += f"""
-    
-    @Test
-    public void testBreakingChange{i}() {{
-        // Test that breaking change is handled: {change_description}
-        // Add assertions to verify the breaking change is handled correctly
-    }}
-            """
+        for i, change_description in enumerate(change_descriptions):
+            change_fields = dict(fields, index=i, change_description=change_description)
+            parts.append(templates["breaking_change"].format_map(change_fields))
         
-        test_content += "\n}"
+        parts.append(templates["footer"])
         
         tests.append({
-            "name": f"test{class_name}Upgrade",
-            "content": test_content,
-            "file": f"{class_name}UpgradeTest.java"
+            "name": templates["name"].format_map(fields),
+            "content": "".join(parts),
+            "file": test_file
         })
         
         return tests
     
-    def _generate_generic_tests(self, 
-                              dependency_name: str, 
-                              api_usage: List[Dict],
-                              breaking_changes: List[Dict]) -> List[Dict]:
-        """
-        Generate generic tests for a dependency upgrade
-        
-        Args:
-            dependency_name: Name of the dependency
-            api_usage: List of API usage examples
-            breaking_changes: List of breaking changes
-            
-        Returns:
-            List[Dict]: Generated generic tests
-        """
-        # Default to pytest format for generic tests
-        return self._generate_pytest_tests(dependency_name, api_usage, breaking_changes)
-    
-    def write_test_files(self, generated_tests: List[Dict]) -> List[str]:
+    def write_test_files(self, generated_tests: List[Dict], framework: Optional[str] = None) -> List[str]:
         """
         Write generated test files to disk
         
         Args:
-            generated_tests: List of generated tests
+            generated_tests: List of generated tests; entries without content are skipped
+            framework: Test framework the tests were generated for (detected if None)
             
         Returns:
             List[str]: List of written test file paths
         """
-        test_framework = self.detect_test_framework()
+        test_framework = framework or self.detect_test_framework()
         
         # Determine the test directory
         test_dir = None
-        
-        if test_framework == "jest":
-            test_dirs = ["__tests__", "test", "tests"]
-        elif test_framework == "pytest":
-            test_dirs = ["tests", "test"]
-        elif test_framework == "junit":
-            test_dirs = ["src/test/java", "test"]
-        else:
-            test_dirs = ["tests", "test"]
+        test_dirs = _TEST_DIRS_BY_FRAMEWORK.get(test_framework, _DEFAULT_TEST_DIRS)
             
         # Find the first existing test directory
         for dir_name in test_dirs:
-            dir_path = os.path.join(self.repo_path, dir_name)
-            if os.path.exists(dir_path) and os.path.isdir(dir_path):
-                test_dir = dir_path
+            if self._has_dir(dir_name):
+                test_dir = os.path.join(self.repo_path, dir_name)
                 break
                 
         # If no test directory exists, create one
         if test_dir is None:
             test_dir = os.path.join(self.repo_path, test_dirs[0])
             os.makedirs(test_dir, exist_ok=True)
+            self._root_dirs.add(test_dirs[0].partition("/")[0])
             
         # Write test files
         written_files = []
         
+        # Directories known to exist, so each is only created once
+        created_dirs: Set[str] = {test_dir}
+        
         for test in generated_tests:
+            # Per-API entries only name the tests their file's entry contains
+            if "content" not in test:
+                continue
+                
             file_path = os.path.join(test_dir, test["file"])
             
             # Create directory if it doesn't exist
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            
-            with open(file_path, 'w') as f:
-                f.write(test["content"])
+            file_dir = os.path.dirname(file_path)
+            if file_dir not in created_dirs:
+                os.makedirs(file_dir, exist_ok=True)
+                created_dirs.add(file_dir)
+            
+            # Written as UTF-8 whatever the locale, with the newlines as generated
+            with open(file_path, 'wb') as f:
+                f.write(test["content"].encode('utf-8'))
                 
             written_files.append(file_path)
             
@@ -586,18 +778,13 @@ public class {class_name}UpgradeTest {{
             command.extend(test_files)
             
         try:
-            result = subprocess.run(
-                command,
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True
-            )
+            returncode, output, error = _run_command(command, self.repo_path)
             
             return {
-                "success": result.returncode == 0,
+                "success": returncode == 0,
                 "framework": "jest",
-                "output": result.stdout,
-                "error": result.stderr if result.returncode != 0 else None
+                "output": output,
+                "error": error if returncode != 0 else None
             }
         except Exception as e:
             return {
@@ -622,18 +809,13 @@ public class {class_name}UpgradeTest {{
             command.extend(test_files)
             
         try:
-            result = subprocess.run(
-                command,
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True
-            )
+            returncode, output, error = _run_command(command, self.repo_path)
             
             return {
-                "success": result.returncode == 0,
+                "success": returncode == 0,
                 "framework": "pytest",
-                "output": result.stdout,
-                "error": result.stderr if result.returncode != 0 else None
+                "output": output,
+                "error": error if returncode != 0 else None
             }
         except Exception as e:
             return {
@@ -654,7 +836,8 @@ public class {class_name}UpgradeTest {{
         """
         # For Maven projects
         if os.path.exists(os.path.join(self.repo_path, "pom.xml")):
-            command = ["mvn", "test"]
+            # Prefer the Maven Daemon when available to skip JVM startup on every run
+            command = ["mvnd" if shutil.which("mvnd") else "mvn", "test"]
             
             if test_files:
                 # Maven can run specific test classes
@@ -688,18 +871,13 @@ public class {class_name}UpgradeTest {{
                     command.extend(["--tests", test_pattern])
             
         try:
-            result = subprocess.run(
-                command,
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True
-            )
+            returncode, output, error = _run_command(command, self.repo_path)
             
             return {
-                "success": result.returncode == 0,
+                "success": returncode == 0,
                 "framework": "junit",
-                "output": result.stdout,
-                "error": result.stderr if result.returncode != 0 else None
+                "output": output,
+                "error": error if returncode != 0 else None
             }
         except Exception as e:
             return {